@@ -5,7 +5,13 @@ Author: Khotso Selading
 Date: 08-01-2024
 """
 import asyncio
-from typing import List
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+)
 
 
 wait_random = __import__('0-basic_async_syntax').wait_random
@@ -19,3 +25,62 @@ async def wait_n(n: int, max_delay: int) -> List[float]:
         *tuple(map(lambda _: wait_random(max_delay), range(n)))
     )
     return sorted(time_delayed)
+
+
+def as_completed(factory: Callable[[], Awaitable], n: int,
+                 max_concurrency: Optional[int] = None) -> AsyncIterator:
+    """ A program that awaits factory() n times and yields the results in
+    completion order. Without max_concurrency every awaitable is started at
+    once with asyncio.as_completed; with it, at most max_concurrency are
+    pending and the next ones are only created as earlier ones finish.
+    Pending awaitables are cancelled if the caller stops iterating. """
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1, not {}".format(
+            max_concurrency))
+    return _as_completed(factory, n, max_concurrency)
+
+
+async def _as_completed(factory: Callable[[], Awaitable], n: int,
+                        max_concurrency: Optional[int]) -> AsyncIterator:
+    """ as_completed, once its arguments are checked. """
+    if max_concurrency is None:
+        pending = [asyncio.ensure_future(factory()) for _ in range(n)]
+        try:
+            for future in asyncio.as_completed(pending):
+                yield await future
+        finally:
+            await _cancel(pending)
+        return
+    finished: asyncio.Queue = asyncio.Queue()
+    pending = set()
+    started = 0
+    try:
+        while started < n or pending:
+            while started < n and len(pending) < max_concurrency:
+                task = asyncio.ensure_future(factory())
+                task.add_done_callback(finished.put_nowait)
+                pending.add(task)
+                started += 1
+            task = await finished.get()
+            pending.discard(task)
+            yield task.result()
+    finally:
+        await _cancel(pending)
+
+
+async def _cancel(tasks) -> None:
+    """ Cancel the unfinished tasks and wait for them to stop. """
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def wait_n_as_completed(n: int, max_delay: int,
+                        max_concurrency: Optional[int] = None
+                        ) -> AsyncIterator[float]:
+    """ A program that spawns wait_random n times with the specified
+    max_delay and yields each delay as soon as it completes, so that the
+    delays arrive in ascending order without sorting. At most
+    max_concurrency coroutines are pending at once when given, and the
+    delays are then only ascending within each window. """
+    return as_completed(lambda: wait_random(max_delay), n, max_concurrency)
@@ -5,15 +5,39 @@ Author: Khotso Selading
 Date: 08-01-2024
 """
 import asyncio
-from typing import List
+from typing import (
+    AsyncIterator,
+    List,
+    Optional,
+)
 
 
 task_wait_random = __import__('3-tasks').task_wait_random
+as_completed = __import__('1-concurrent_coroutines').as_completed
+WorkerPool = __import__('5-worker_pool').WorkerPool
 
 
-async def task_wait_n(n: int, max_delay: int) -> List[float]:
-    """ A program that executes task_wait_random n times. """
-    time_delayed = await asyncio.gather(
-        *tuple(map(lambda _: task_wait_random(max_delay), range(n)))
-    )
+async def task_wait_n(n: int, max_delay: int,
+                      workers: int = 1000) -> List[float]:
+    """ A program that executes task_wait_random n times. Up to workers
+    tasks are gathered directly; larger n run on a pool of workers tasks
+    so that they do not create n tasks at once. """
+    if n <= workers:
+        time_delayed = await asyncio.gather(
+            *tuple(map(lambda _: task_wait_random(max_delay), range(n)))
+        )
+        return sorted(time_delayed)
+    async with WorkerPool(max(workers, 1)) as pool:
+        time_delayed = [delay async for delay in pool.map(
+            lambda _: task_wait_random(max_delay), range(n))]
     return sorted(time_delayed)
+
+
+def task_wait_n_as_completed(n: int, max_delay: int,
+                             max_concurrency: Optional[int] = None
+                             ) -> AsyncIterator[float]:
+    """ A program that executes task_wait_random n times and yields each
+    delay as soon as its task completes. At most max_concurrency tasks
+    exist at once when given. """
+    return as_completed(lambda: task_wait_random(max_delay), n,
+                        max_concurrency)
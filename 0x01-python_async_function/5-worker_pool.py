@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Topic: Python - Async
+Author: Khotso Selading
+Date: 08-01-2024
+"""
+import asyncio
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+)
+
+
+class WorkerPool:
+    """ A pool of a fixed number of worker coroutines running jobs from a
+    bounded queue. A job is a callable returning an awaitable; submit
+    waits while the queue is full, so producers are slowed down to the
+    pace of the workers instead of piling up tasks. Each job may be given
+    a timeout, cancelling its returned future cancels the job, and leaving
+    the pool on an error, or calling cancel, cancels every queued and
+    running job.
+    >>> async with WorkerPool(workers=4) as pool:
+    ...     future = await pool.submit(lambda: wait_random(3))
+    ...     await future
+    1.2707
+    """
+
+    def __init__(self, workers: int = 10, queue_size: Optional[int] = None,
+                 timeout: Optional[float] = None) -> None:
+        """ Init method of WorkerPool, queue_size defaults to twice the
+        number of workers. """
+        self.workers = workers
+        self.timeout = timeout
+        self._queue: asyncio.Queue = asyncio.Queue(
+            workers * 2 if queue_size is None else queue_size)
+        self._workers: List[asyncio.Task] = []
+        self._stopping = False
+
+    async def __aenter__(self) -> "WorkerPool":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            await self.join()
+        else:
+            await self.cancel()
+
+    def start(self) -> None:
+        """ Start the workers. """
+        if not self._workers:
+            self._workers = [asyncio.ensure_future(self._work())
+                             for _ in range(self.workers)]
+
+    async def submit(self, job: Callable[[], Awaitable],
+                     timeout: Optional[float] = None) -> asyncio.Future:
+        """ Queue job, waiting for room, and return the future of its
+        result; timeout defaults to the pool's. """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future,
+                               self.timeout if timeout is None else timeout))
+        return future
+
+    async def map(self, fn: Callable[[Any], Awaitable],
+                  items: Iterable) -> AsyncIterator:
+        """ Yield fn(item) for every item, in completion order, with at
+        most the queue and the workers holding jobs at any time. """
+        finished: asyncio.Queue = asyncio.Queue()
+        futures = set()
+
+        async def produce() -> None:
+            for item in items:
+                future = await self.submit(lambda item=item: fn(item))
+                futures.add(future)
+                future.add_done_callback(finished.put_nowait)
+
+        producer = asyncio.ensure_future(produce())
+        producer.add_done_callback(finished.put_nowait)
+        try:
+            while not producer.done() or futures:
+                future = await finished.get()
+                if future is producer:
+                    producer.result()
+                    continue
+                futures.discard(future)
+                yield future.result()
+        finally:
+            producer.cancel()
+            for future in futures:
+                future.cancel()
+
+    async def join(self) -> None:
+        """ Wait for every queued job, then stop the workers. """
+        await self._queue.join()
+        await self._stop()
+
+    async def cancel(self) -> None:
+        """ Cancel every queued and running job and stop the workers. """
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            future.cancel()
+            self._queue.task_done()
+        await self._stop()
+
+    async def _stop(self) -> None:
+        """ Cancel the workers and wait for them to exit. """
+        self._stopping = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._stopping = False
+
+    async def _work(self) -> None:
+        """ Run queued jobs until cancelled. """
+        while True:
+            job, future, timeout = await self._queue.get()
+            try:
+                if not future.cancelled():
+                    await self._run(job, future, timeout)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Callable[[], Awaitable],
+                   future: asyncio.Future, timeout: Optional[float]) -> None:
+        """ Run one job, settling future with its outcome. """
+        try:
+            task = asyncio.ensure_future(job())
+            future.add_done_callback(
+                lambda future: task.cancel() if future.cancelled() else None)
+            if timeout is None:
+                result = await task
+            else:
+                result = await asyncio.wait_for(task, timeout)
+        except asyncio.CancelledError:
+            future.cancel()
+            if self._stopping:
+                raise
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+        else:
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Topic: Python - Async
+Author: Khotso Selading
+Date: 08-01-2024
+"""
+import asyncio
+import os
+from typing import Any, Coroutine, List, Optional
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+def available() -> List[str]:
+    """ A program that returns the names of the event loops that can be
+    used: asyncio, and uvloop when it is installed. """
+    return ["asyncio"] if uvloop is None else ["asyncio", "uvloop"]
+
+
+def loop_name(name: Optional[str] = None) -> str:
+    """ A program that resolves the event loop to use: name, else the
+    ASYNC_LOOP environment variable, else uvloop when it is installed and
+    asyncio otherwise. """
+    name = name or os.environ.get("ASYNC_LOOP") or available()[-1]
+    if name not in ("asyncio", "uvloop"):
+        raise ValueError("unknown event loop {!r}".format(name))
+    if name == "uvloop" and uvloop is None:
+        raise ImportError("uvloop is not installed")
+    return name
+
+
+def new_event_loop(name: Optional[str] = None) -> asyncio.AbstractEventLoop:
+    """ A program that returns a new event loop of the loop_name(name)
+    kind. """
+    if loop_name(name) == "uvloop":
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def install(name: Optional[str] = None) -> str:
+    """ A program that sets the event loop policy to the loop_name(name)
+    kind, so that every later asyncio.run uses it, and returns the name. """
+    name = loop_name(name)
+    asyncio.set_event_loop_policy(
+        uvloop.EventLoopPolicy() if name == "uvloop" else None)
+    return name
+
+
+def run(main: Coroutine, name: Optional[str] = None) -> Any:
+    """ A program that runs main to completion on a new event loop of the
+    loop_name(name) kind, like asyncio.run, and returns its result. """
+    loop = new_event_loop(name)
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(
+                    asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            loop.close()
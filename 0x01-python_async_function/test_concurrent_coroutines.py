@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Topic: Python - Async
+Author: Khotso Selading
+Date: 08-01-2024
+"""
+
+import asyncio
+import unittest
+from parameterized import parameterized
+
+concurrent_coroutines = __import__('1-concurrent_coroutines')
+as_completed = concurrent_coroutines.as_completed
+wait_n_as_completed = concurrent_coroutines.wait_n_as_completed
+task_wait_n_as_completed = __import__('4-tasks').task_wait_n_as_completed
+
+
+class TestAsCompleted(unittest.IsolatedAsyncioTestCase):
+    """
+    TestAsCompleted
+    """
+
+    @parameterized.expand([(None,), (2,)])
+    async def test_order(self, max_concurrency):
+        """tests that results are yielded in completion order"""
+        delays = iter([0.05, 0.01, 0.02, 0.03])
+
+        async def job():
+            delay = next(delays)
+            await asyncio.sleep(delay)
+            return delay
+
+        results = [result async for result in as_completed(
+            job, 4, max_concurrency)]
+        expected = {None: [0.01, 0.02, 0.03, 0.05],
+                    2: [0.01, 0.02, 0.05, 0.03]}[max_concurrency]
+        self.assertEqual(results, expected)
+
+    async def test_bound(self):
+        """tests that at most max_concurrency awaitables are pending"""
+        running, peak = 0, 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+
+        count = 0
+        async for _ in as_completed(job, 20, 3):
+            count += 1
+        self.assertEqual(count, 20)
+        self.assertEqual(peak, 3)
+
+    @parameterized.expand([(None, 4), (2, 1)])
+    async def test_aclose(self, max_concurrency, pending):
+        """tests that closing early cancels the pending awaitables"""
+        started, cancelled = [], []
+
+        async def job():
+            started.append(1)
+            try:
+                await asyncio.sleep(0 if len(started) == 1 else 10)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        results = as_completed(job, 5, max_concurrency)
+        await results.__anext__()
+        await results.aclose()
+        self.assertEqual(len(cancelled), pending)
+        self.assertEqual(asyncio.all_tasks(), {asyncio.current_task()})
+
+    @parameterized.expand([(0,), (-1,)])
+    def test_max_concurrency(self, max_concurrency):
+        """tests that max_concurrency below 1 raises ValueError"""
+        for function in (wait_n_as_completed, task_wait_n_as_completed):
+            with self.assertRaises(ValueError):
+                function(5, 0, max_concurrency)
+
+    @parameterized.expand([(None,), (4,)])
+    async def test_wait_n(self, max_concurrency):
+        """tests that every delay is yielded"""
+        for function in (wait_n_as_completed, task_wait_n_as_completed):
+            delays = [delay async for delay in function(
+                10, 0.01, max_concurrency)]
+            self.assertEqual(len(delays), 10)
+            self.assertTrue(all(0 <= delay <= 0.01 for delay in delays))
+
+
+if __name__ == "__main__":
+    unittest.main()
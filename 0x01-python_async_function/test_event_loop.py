@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Topic: Python - Async
+Author: Khotso Selading
+Date: 08-01-2024
+"""
+
+import asyncio
+import time
+import unittest
+from parameterized import parameterized
+from unittest.mock import Mock, patch
+
+event_loop = __import__('6-event_loop')
+
+
+def fake_uvloop() -> Mock:
+    """a stand-in uvloop module making asyncio loops"""
+    return Mock(new_event_loop=Mock(side_effect=asyncio.new_event_loop),
+                EventLoopPolicy=asyncio.DefaultEventLoopPolicy)
+
+
+class TestLoopName(unittest.TestCase):
+    """
+    TestLoopName
+    """
+
+    @parameterized.expand([
+        (None, None, False, "asyncio"),
+        (None, None, True, "uvloop"),
+        (None, "asyncio", True, "asyncio"),
+        ("uvloop", "asyncio", True, "uvloop"),
+        ("asyncio", "uvloop", True, "asyncio"),
+    ])
+    def test_loop_name(self, name, env, installed, expected):
+        """tests that name wins over ASYNC_LOOP, which wins over the
+        default"""
+        environ = {} if env is None else {"ASYNC_LOOP": env}
+        with patch.dict(event_loop.os.environ, environ, clear=True), \
+                patch.object(event_loop, "uvloop",
+                             fake_uvloop() if installed else None):
+            self.assertEqual(event_loop.loop_name(name), expected)
+
+    def test_unknown(self):
+        """tests that an unknown loop raises ValueError"""
+        with self.assertRaises(ValueError):
+            event_loop.loop_name("trio")
+        with patch.dict(event_loop.os.environ, {"ASYNC_LOOP": "trio"}):
+            with self.assertRaises(ValueError):
+                event_loop.loop_name()
+
+    def test_missing_uvloop(self):
+        """tests that asking for uvloop without it raises ImportError"""
+        with patch.object(event_loop, "uvloop", None):
+            self.assertEqual(event_loop.available(), ["asyncio"])
+            with self.assertRaises(ImportError):
+                event_loop.loop_name("uvloop")
+
+
+class TestEventLoop(unittest.TestCase):
+    """
+    TestEventLoop
+    """
+
+    def test_new_event_loop(self):
+        """tests that loops come from the module of their name"""
+        uvloop = fake_uvloop()
+        with patch.object(event_loop, "uvloop", uvloop):
+            event_loop.new_event_loop("asyncio").close()
+            uvloop.new_event_loop.assert_not_called()
+            event_loop.new_event_loop("uvloop").close()
+            uvloop.new_event_loop.assert_called_once_with()
+
+    def test_install(self):
+        """tests that install sets, or resets, the event loop policy"""
+        self.addCleanup(asyncio.set_event_loop_policy, None)
+        uvloop = Mock(EventLoopPolicy=type(
+            "EventLoopPolicy", (asyncio.DefaultEventLoopPolicy,), {}))
+        with patch.object(event_loop, "uvloop", uvloop):
+            self.assertEqual(event_loop.install("uvloop"), "uvloop")
+            self.assertIsInstance(asyncio.get_event_loop_policy(),
+                                  uvloop.EventLoopPolicy)
+            self.assertEqual(event_loop.install("asyncio"), "asyncio")
+            self.assertNotIsInstance(asyncio.get_event_loop_policy(),
+                                     uvloop.EventLoopPolicy)
+
+    def test_run(self):
+        """tests that run returns the result, cancels leftover tasks and
+        waits for the jobs of the default executor"""
+        leftover, finished = [], []
+
+        def job():
+            time.sleep(0.05)
+            finished.append(1)
+
+        async def main():
+            leftover.append(asyncio.ensure_future(asyncio.sleep(10)))
+            asyncio.get_running_loop().run_in_executor(None, job)
+            return 42
+
+        self.assertEqual(event_loop.run(main(), "asyncio"), 42)
+        self.assertTrue(leftover[0].cancelled())
+        self.assertEqual(finished, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Topic: Python - Async
+Author: Khotso Selading
+Date: 08-01-2024
+"""
+
+import asyncio
+import unittest
+
+WorkerPool = __import__('5-worker_pool').WorkerPool
+task_wait_n = __import__('4-tasks').task_wait_n
+
+
+async def value(result, delay: float = 0):
+    """return result after delay seconds"""
+    await asyncio.sleep(delay)
+    return result
+
+
+class TestWorkerPool(unittest.IsolatedAsyncioTestCase):
+    """
+    TestWorkerPool
+    """
+
+    async def test_submit(self):
+        """tests that submitted jobs resolve their futures"""
+        async with WorkerPool(workers=2) as pool:
+            futures = [await pool.submit(lambda i=i: value(i))
+                       for i in range(5)]
+            self.assertEqual(await asyncio.gather(*futures), list(range(5)))
+
+    async def test_timeout(self):
+        """tests that a job outliving its timeout fails its future only"""
+        async with WorkerPool(workers=1, timeout=0.01) as pool:
+            slow = await pool.submit(lambda: value(1, 1))
+            fast = await pool.submit(lambda: value(2))
+            with self.assertRaises(asyncio.TimeoutError):
+                await slow
+            self.assertEqual(await fast, 2)
+
+    async def test_cancel_future(self):
+        """tests that cancelling a future cancels its running job"""
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def job():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async with WorkerPool(workers=1) as pool:
+            future = await pool.submit(job)
+            await started.wait()
+            future.cancel()
+            await asyncio.wait_for(cancelled.wait(), 1)
+            self.assertEqual(await (await pool.submit(lambda: value(3))), 3)
+
+    async def test_raising_job(self):
+        """tests that a job raising synchronously, or not returning an
+        awaitable, fails its future and leaves the worker running"""
+        def bad():
+            raise ValueError("bad")
+
+        async with WorkerPool(workers=1) as pool:
+            raising = await pool.submit(bad)
+            not_awaitable = await pool.submit(lambda: 42)
+            after = await pool.submit(lambda: value(4))
+            with self.assertRaises(ValueError):
+                await asyncio.wait_for(raising, 1)
+            with self.assertRaises(TypeError):
+                await asyncio.wait_for(not_awaitable, 1)
+            self.assertEqual(await asyncio.wait_for(after, 1), 4)
+
+    async def test_cancel_pool(self):
+        """tests that leaving on an error cancels queued and running jobs"""
+        with self.assertRaises(RuntimeError):
+            async with WorkerPool(workers=1) as pool:
+                running = await pool.submit(lambda: value(1, 10))
+                queued = await pool.submit(lambda: value(2, 10))
+                await asyncio.sleep(0)
+                raise RuntimeError
+        self.assertTrue(running.cancelled())
+        self.assertTrue(queued.cancelled())
+
+    async def test_map(self):
+        """tests that map yields every result in completion order"""
+        async with WorkerPool(workers=3) as pool:
+            results = [result async for result in pool.map(
+                lambda i: value(i, i / 100), [3, 1, 2])]
+        self.assertEqual(results, [1, 2, 3])
+
+    async def test_map_close(self):
+        """tests that closing map early cancels the outstanding jobs"""
+        started = []
+
+        async def job(i):
+            started.append(i)
+            return await value(i, i and 10)
+
+        async with WorkerPool(workers=2, queue_size=2) as pool:
+            results = pool.map(job, range(100))
+            self.assertEqual(await results.__anext__(), 0)
+            await results.aclose()
+            await asyncio.sleep(0)
+        self.assertLess(len(started), 100)
+
+
+class TestTaskWaitN(unittest.IsolatedAsyncioTestCase):
+    """
+    TestTaskWaitN
+    """
+
+    async def test_task_wait_n(self):
+        """tests both the gathered and the pooled paths"""
+        for n, workers in ((5, 1000), (20, 3)):
+            delays = await task_wait_n(n, 0.01, workers)
+            self.assertEqual(len(delays), n)
+            self.assertEqual(delays, sorted(delays))
+
+
+if __name__ == "__main__":
+    unittest.main()
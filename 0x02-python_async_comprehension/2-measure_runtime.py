@@ -14,7 +14,7 @@ async_comprehension = using('1-async_comprehension').async_comprehension
 
 async def measure_runtime() -> float:
     """A function that executes async_comprehension 4 times and measures the
-    total execution time. """
-    start_time = time.time()
+    total execution time, with the monotonic perf_counter_ns. """
+    start_time = time.perf_counter_ns()
     await asyncio.gather(*(async_comprehension() for _ in range(4)))
-    return time.time() - start_time
+    return (time.perf_counter_ns() - start_time) / 1e9
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Batched GraphQL fetching of orgs and their repos for github org client.
+"""
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from utils import Transport, post_json
+
+__all__ = [
+    "GRAPHQL_URL",
+    "GraphqlError",
+    "build_query",
+    "fetch_orgs",
+]
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+REST_REPOS_URL = "https://api.github.com/orgs/{org}/repos"
+ORG_QUERY = """
+  org{i}: organization(login: $login{i}) {{
+    login name description url
+    repositories(first: {first}, after: $after{i}, privacy: PUBLIC,
+                 orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{ name updatedAt owner {{ login }} licenseInfo {{ key }} }}
+    }}
+  }}"""
+
+OrgPayload = Tuple[Dict, List[Dict]]
+
+
+class GraphqlError(Exception):
+    """Raised when a GraphQL query returns no data.
+    """
+
+    def __init__(self, errors: List[Dict]) -> None:
+        """Init method of GraphqlError"""
+        super().__init__("; ".join(
+            error.get("message", str(error)) for error in errors))
+        self.errors = errors
+
+
+def build_query(count: int, first: int = 100) -> str:
+    """Query for count orgs, with ``$login<i>`` and ``$after<i>``
+    variables, fetching first repos of each.
+    """
+    variables = ", ".join("$login{0}: String!, $after{0}: String".format(i)
+                          for i in range(count))
+    return "query({}) {{{}\n}}".format(variables, "".join(
+        ORG_QUERY.format(i=i, first=first) for i in range(count)))
+
+
+def fetch_orgs(org_names: Iterable[str],
+               transport: Optional[Transport] = None,
+               batch_size: int = 10, per_page: int = 100,
+               url: str = GRAPHQL_URL) -> Dict[str, OrgPayload]:
+    """Fetch orgs and all their public repos with batched GraphQL queries.
+    Each query asks for the next page of repos of up to ``batch_size``
+    orgs at once, so a batch needs as many queries as its largest org
+    has pages of ``per_page`` repos. Results are shaped like the REST
+    payloads read by ``GithubOrgClient``: the org has ``login`` and
+    ``repos_url``, and each repo ``name``, ``license.key`` (or a null
+    ``license``), ``owner.login`` and ``updated_at``. Orgs that do not
+    exist, reported as ``NOT_FOUND``, are left out; any other null org
+    raises ``GraphqlError``. GraphQL needs a token, passed in the
+    ``Authorization`` header of ``transport``.
+    Example
+    -------
+    >>> transport = Transport(headers={"Authorization": "bearer TOKEN"})
+    >>> org, repos = fetch_orgs(["google"], transport)["google"]
+    >>> repos[0]
+    {'name': 'episodes.dart', 'license': {'key': 'bsd-3-clause'}, ...}
+    """
+    names = list(dict.fromkeys(org_names))
+    results: Dict[str, OrgPayload] = {}
+    for start in range(0, len(names), batch_size):
+        results.update(_fetch_batch(names[start:start + batch_size],
+                                    transport, per_page, url))
+    return results
+
+
+def _fetch_batch(names: Sequence[str], transport: Optional[Transport],
+                 per_page: int, url: str) -> Dict[str, OrgPayload]:
+    """fetch_orgs for one batch of names"""
+    results: Dict[str, OrgPayload] = {}
+    cursors: Dict[str, Optional[str]] = {name: None for name in names}
+    while cursors:
+        pending = list(cursors)
+        variables: Dict[str, Any] = {}
+        for i, name in enumerate(pending):
+            variables["login{}".format(i)] = name
+            variables["after{}".format(i)] = cursors[name]
+        response = post_json(url, {
+            "query": build_query(len(pending), per_page),
+            "variables": variables,
+        }, transport)
+        data = response.get("data")
+        errors = response.get("errors") or []
+        if not data:
+            raise GraphqlError(errors or [response])
+        missing = {error["path"][0] for error in errors
+                   if error.get("type") == "NOT_FOUND" and error.get("path")}
+        for i, name in enumerate(pending):
+            alias = "org{}".format(i)
+            node = data.get(alias)
+            if node is None:
+                if alias not in missing:
+                    raise GraphqlError(errors or [{
+                        "message": "No data for {!r}".format(name)}])
+                del cursors[name]
+                continue
+            if name not in results:
+                results[name] = (_org(node), [])
+            repositories = node["repositories"]
+            results[name][1].extend(
+                _repo(repo) for repo in repositories["nodes"])
+            page_info = repositories["pageInfo"]
+            if page_info["hasNextPage"]:
+                cursors[name] = page_info["endCursor"]
+            else:
+                del cursors[name]
+    return results
+
+
+def _org(node: Dict) -> Dict:
+    """REST shaped org of a GraphQL organization"""
+    return {
+        "login": node["login"],
+        "name": node.get("name"),
+        "description": node.get("description"),
+        "html_url": node.get("url"),
+        "repos_url": REST_REPOS_URL.format(org=node["login"]),
+    }
+
+
+def _repo(node: Dict) -> Dict:
+    """REST shaped repo of a GraphQL repository"""
+    license_info = node.get("licenseInfo")
+    return {
+        "name": node["name"],
+        "license": None if license_info is None else {
+            "key": license_info["key"]},
+        "owner": {"login": (node.get("owner") or {}).get("login")},
+        "updated_at": node.get("updatedAt"),
+    }
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Persistent response cache for github org client.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import (
+    Any,
+    Dict,
+    Optional,
+)
+
+__all__ = [
+    "DiskCache",
+]
+
+
+class DiskCache:
+    """SQLite backed cache of JSON values with TTL and LRU eviction.
+    Entries expire ``ttl`` seconds after they are stored; ``ttls`` maps
+    URL prefixes to their own TTL, the longest matching prefix wins. Once
+    the stored values exceed ``max_bytes``, the least recently read ones
+    are evicted. The database runs in WAL mode so that several worker
+    processes can share one file.
+    Example
+    -------
+    >>> cache = DiskCache("~/.cache/github.sqlite3", ttl=300,
+    ...                   ttls={"https://api.github.com/orgs/": 3600})
+    >>> transport = Transport(store=cache)
+    """
+
+    def __init__(self, path: str, ttl: float = 300,
+                 ttls: Optional[Dict[str, float]] = None,
+                 max_bytes: int = 64 * 1024 * 1024) -> None:
+        """Init method of DiskCache"""
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires REAL NOT NULL,"
+                " accessed REAL NOT NULL)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed"
+                " ON entries (accessed)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the current thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def ttl_for(self, key: str) -> float:
+        """TTL of key, from its longest matching prefix"""
+        prefixes = [prefix for prefix in self.ttls if key.startswith(prefix)]
+        if not prefixes:
+            return self.ttl
+        return self.ttls[max(prefixes, key=len)]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Fresh value of key, or None"""
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires > ?",
+                (key, now)).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key, then evict down to max_bytes"""
+        data = json.dumps(value, separators=(",", ":"))
+        now = time.time()
+        expires = now + (self.ttl_for(key) if ttl is None else ttl)
+        with self._connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), expires, now))
+            connection.execute(
+                "DELETE FROM entries WHERE expires <= ?", (now,))
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Delete the least recently read entries above max_bytes"""
+        total, = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = connection.execute(
+            "SELECT key, size FROM entries ORDER BY accessed").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def delete(self, key: str) -> None:
+        """Forget key"""
+        with self._connection() as connection:
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Forget every entry"""
+        with self._connection() as connection:
+            connection.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        """Close the connection of the current thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
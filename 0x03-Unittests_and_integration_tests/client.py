@@ -1,31 +1,73 @@
 #!/usr/bin/env python3
 """A github org client
 """
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from operator import attrgetter, itemgetter
 from typing import (
+    Any,
+    Callable,
     List,
     Dict,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+    AsyncIterator,
+    Iterable,
+    NamedTuple,
 )
 
+from bulk import GRAPHQL_URL, GraphqlError, fetch_orgs
+from records import record_type
 from utils import (
+    INFLIGHT,
+    MemoCache,
+    Transport,
     get_json,
-    access_nested_map,
+    get_json_page,
+    get_json_pages,
+    get_json_stream,
+    page_urls,
+    compile_path,
     memoize,
+    shared_memoize,
 )
 
+ORG_CACHE = MemoCache(maxsize=1024, ttl=300)
+LICENSE_KEY = compile_path(("license", "key"), default=None)
+UPDATED_AT = compile_path(("updated_at",), default="")
+REPO_FIELDS = (("name",), ("license", "key"))
+
 
 class GithubOrgClient:
     """A Githib org client
+    With ``fields``, a sequence of dotted key paths such as
+    ``("name", "license.key")``, the repos payload is kept as compact
+    ``records.record_type(fields)`` records instead of GitHub JSON.
     """
     ORG_URL = "https://api.github.com/orgs/{org}"
+    PER_PAGE = 100
 
-    def __init__(self, org_name: str) -> None:
+    def __init__(self, org_name: str,
+                 transport: Optional[Transport] = None,
+                 fields: Optional[Sequence[str]] = None) -> None:
         """Init method of GithubOrgClient"""
         self._org_name = org_name
+        self._transport = transport
+        self._record_type = None if fields is None else record_type(fields)
+
+    def _get_json(self, url: str) -> Dict:
+        """get_json through the client transport, if any"""
+        if self._transport is None:
+            return get_json(url)
+        return get_json(url, self._transport)
 
     @memoize
     def org(self) -> Dict:
         """Memoize org"""
-        return get_json(self.ORG_URL.format(org=self._org_name))
+        return self._get_json(self.ORG_URL.format(org=self._org_name))
 
     @property
     def _public_repos_url(self) -> str:
@@ -35,24 +77,433 @@ class GithubOrgClient:
     @memoize
     def repos_payload(self) -> Dict:
         """Memoize repos payload"""
-        return get_json(self._public_repos_url)
+        return self._project(self._get_repos())
+
+    def _get_repos(self) -> List[Dict]:
+        """Every page of the public repos listing"""
+        repos: List[Dict] = []
+        for page in get_json_pages(self._public_repos_url,
+                                   {"per_page": self.PER_PAGE},
+                                   self._transport):
+            repos.extend(page)
+        return repos
+
+    def _project(self, json_payload: List[Dict]) -> List[Any]:
+        """Compact records of json_payload, if the client has fields"""
+        if self._record_type is None:
+            return json_payload
+        return [self._record_type.from_json(repo) for repo in json_payload]
+
+    def _repo_getters(self) -> Tuple[Callable, Callable]:
+        """Name and license key getters of repos payload items"""
+        if self._record_type is None:
+            return itemgetter("name"), LICENSE_KEY
+        return attrgetter("name"), attrgetter("license_key")
+
+    def refresh(self) -> None:
+        """Forget the memoized org and repos payload"""
+        self.__dict__.pop("_org", None)
+        self.__dict__.pop("_repos_payload", None)
+
+    def _store_repos_payload(self, json_payload: List[Any]) -> None:
+        """Replace the memoized repos payload"""
+        self._repos_payload = json_payload
+
+    def _cached_license_index(self) -> Optional[Tuple]:
+        """Repos payload and license index built from it, if any"""
+        return self.__dict__.get("_license_index")
+
+    def _store_license_index(self, index: Tuple) -> None:
+        """Keep the repos payload and license index built from it"""
+        self._license_index = index
+
+    def sync(self) -> List[Any]:
+        """Merge the repos updated since the repos payload was fetched.
+        Pages the repos listing most recently updated first and stops at
+        the first repo not newer than the newest one already known, then
+        merges the changed repos into the repos payload and the license
+        index. Returns the changed repos. Deleted repos are only dropped
+        by a ``refresh``.
+        """
+        json_payload = self.repos_payload
+        if self._record_type is None:
+            updated_of = UPDATED_AT
+        elif "updated_at" in self._record_type.__slots__:
+            updated_of = attrgetter("updated_at")
+        else:
+            raise ValueError("sync needs the updated_at field")
+        watermark = max(map(updated_of, json_payload), default="")
+        params = {"per_page": self.PER_PAGE, "sort": "updated",
+                  "direction": "desc"}
+        changed = []
+        for page in get_json_pages(self._public_repos_url, params,
+                                   self._transport):
+            fresh = [repo for repo in page if UPDATED_AT(repo) > watermark]
+            changed.extend(fresh)
+            if len(fresh) < len(page):
+                break
+        if changed:
+            self._merge(json_payload, self._project(changed))
+        return changed
+
+    def _merge(self, json_payload: List[Any], changed: List[Any]) -> None:
+        """Store json_payload with changed repos merged, and the license
+        index updated to match"""
+        name_of, license_of = self._repo_getters()
+        names_by_key = {key: list(names)
+                        for key, names in self.license_index.items()}
+        positions = {name_of(repo): i for i, repo in enumerate(json_payload)}
+        merged = list(json_payload)
+        for repo in reversed(changed):
+            name = name_of(repo)
+            position = positions.get(name)
+            if position is None:
+                positions[name] = len(merged)
+                merged.append(repo)
+            else:
+                names_by_key[license_of(merged[position])].remove(name)
+                merged[position] = repo
+            names_by_key.setdefault(license_of(repo), []).append(name)
+        self._store_repos_payload(merged)
+        self._store_license_index((merged, names_by_key))
+
+    @property
+    def license_index(self) -> Dict[Optional[str], List[str]]:
+        """Repo names by license key.
+        Built on first use and rebuilt whenever the repos payload is not
+        the one it was built from.
+        """
+        json_payload = self.repos_payload
+        index = self._cached_license_index()
+        if index is None or index[0] is not json_payload:
+            name_of, license_of = self._repo_getters()
+            names_by_key: Dict[Optional[str], List[str]] = {}
+            for repo in json_payload:
+                names_by_key.setdefault(
+                    license_of(repo), []).append(name_of(repo))
+            index = (json_payload, names_by_key)
+            self._store_license_index(index)
+        return index[1]
 
     def public_repos(self, license: str = None) -> List[str]:
         """Public repos"""
+        if license is not None:
+            return list(self.license_index.get(license, ()))
         json_payload = self.repos_payload
-        public_repos = [
-            repo["name"] for repo in json_payload
-            if license is None or self.has_license(repo, license)
-        ]
+        name_of, _ = self._repo_getters()
+        public_repos = [name_of(repo) for repo in json_payload]
 
         return public_repos
 
+    def iter_public_repos(self, license: str = None,
+                          stream: bool = False) -> Iterator[str]:
+        """Public repos, fetched page by page.
+        Follows the pagination links of the repos URL and yields names
+        as each page arrives instead of loading the whole payload. With
+        ``stream``, each page is parsed while it downloads and only the
+        name and license key of each repo are built.
+        """
+        params = {"per_page": self.PER_PAGE}
+        if stream:
+            repos = get_json_stream(self._public_repos_url, REPO_FIELDS,
+                                    params, self._transport)
+        else:
+            repos = (repo for page in get_json_pages(
+                self._public_repos_url, params, self._transport)
+                for repo in page)
+        for repo in repos:
+            if license is None or self.has_license(repo, license):
+                yield repo["name"]
+
     @staticmethod
     def has_license(repo: Dict[str, Dict], license_key: str) -> bool:
         """Static: has_license"""
         assert license_key is not None, "license_key cannot be None"
+        return LICENSE_KEY(repo) == license_key
+
+
+class CachedGithubOrgClient(GithubOrgClient):
+    """A Github org client sharing org and repos payloads process-wide
+    Every instance for the same org reads them, and the license index,
+    from ``ORG_CACHE``, so building a client per request neither refetches
+    the payloads nor rebuilds the index.
+    """
+
+    @property
+    def _cache_key(self) -> Tuple:
+        """Org name and record type, repos payloads differ by both"""
+        return self._org_name, self._record_type
+
+    @shared_memoize("_cache_key", ORG_CACHE)
+    def org(self) -> Dict:
+        """Shared org"""
+        return self._get_json(self.ORG_URL.format(org=self._org_name))
+
+    @shared_memoize("_cache_key", ORG_CACHE)
+    def repos_payload(self) -> Dict:
+        """Shared repos payload"""
+        return self._project(self._get_repos())
+
+    def _store_repos_payload(self, json_payload: List[Any]) -> None:
+        """Replace the shared repos payload"""
+        ORG_CACHE.set((type(self), "repos_payload", self._cache_key),
+                      json_payload)
+
+    def _cached_license_index(self) -> Optional[Tuple]:
+        """Shared repos payload and license index built from it, if any"""
+        return ORG_CACHE.get((type(self), "license_index", self._cache_key))
+
+    def _store_license_index(self, index: Tuple) -> None:
+        """Share the repos payload and license index built from it"""
+        ORG_CACHE.set((type(self), "license_index", self._cache_key), index)
+
+    def refresh(self) -> None:
+        """Forget the shared org, repos payload and license index"""
+        for name in ("org", "repos_payload", "license_index"):
+            ORG_CACHE.delete((type(self), name, self._cache_key))
+
+
+class GraphqlGithubOrgClient(GithubOrgClient):
+    """A Github org client reading the GraphQL API
+    The org and its public repos are fetched together by
+    ``bulk.fetch_orgs``, in one query per 100 repos, instead of a REST
+    request for the org and one per page of repos. ``many`` fetches the
+    clients of several orgs with the same batched queries. GraphQL needs
+    a transport with a token; ``sync`` still pages the REST listing.
+    Queries are sent by ``post_json``, bypassing the limiter, retry and
+    circuit breaker of the transport, which only apply to GET requests.
+    Example
+    -------
+    >>> clients = GraphqlGithubOrgClient.many(["google", "abc"], transport)
+    >>> clients["google"].public_repos("apache-2.0")
+    ['dagger', 'kratu', ...]
+    """
+    GRAPHQL_URL = GRAPHQL_URL
+
+    @classmethod
+    def many(cls, org_names: Iterable[str],
+             transport: Optional[Transport] = None,
+             fields: Optional[Sequence[str]] = None,
+             batch_size: int = 10) -> Dict[str, "GraphqlGithubOrgClient"]:
+        """Clients of the orgs that exist, by org name, fetched in batches
+        of batch_size orgs"""
+        payloads = fetch_orgs(org_names, transport, batch_size,
+                              url=cls.GRAPHQL_URL)
+        clients = {}
+        for org_name, payload in payloads.items():
+            client = clients[org_name] = cls(org_name, transport, fields)
+            client._bulk_payload = payload
+        return clients
+
+    @memoize
+    def bulk_payload(self) -> Tuple[Dict, List[Dict]]:
+        """Memoize org and repos payload"""
+        payloads = fetch_orgs([self._org_name], self._transport,
+                              url=self.GRAPHQL_URL)
+        if self._org_name not in payloads:
+            raise GraphqlError([{"message": "Could not resolve to an "
+                                 "Organization with the login of "
+                                 "'{}'.".format(self._org_name)}])
+        return payloads[self._org_name]
+
+    @memoize
+    def org(self) -> Dict:
+        """Memoize org"""
+        return self.bulk_payload[0]
+
+    @memoize
+    def repos_payload(self) -> Dict:
+        """Memoize repos payload"""
+        return self._project(self.bulk_payload[1])
+
+    def refresh(self) -> None:
+        """Forget the memoized org and repos payload"""
+        super().refresh()
+        self.__dict__.pop("_bulk_payload", None)
+
+
+class AsyncGithubOrgClient:
+    """An asyncio Github org client
+    Pages of the repos listing are fetched concurrently once the page
+    count is known. At most ``max_concurrency`` requests are in flight,
+    or as many as ``semaphore`` allows when clients share one. Requests
+    are sent from the threads of ``executor``, which needs as many
+    workers as requests may be in flight; without one, the client starts
+    its own pool of ``max_concurrency`` threads, shut down by ``close``.
+    A transport should pool at least that many connections per host.
+    Example
+    -------
+    >>> async with AsyncGithubOrgClient("google") as client:
+    ...     await client.public_repos("apache-2.0")
+    ['episodes.dart', ...]
+    """
+    ORG_URL = GithubOrgClient.ORG_URL
+    PER_PAGE = GithubOrgClient.PER_PAGE
+
+    def __init__(self, org_name: str, max_concurrency: int = 8,
+                 transport: Optional[Transport] = None,
+                 semaphore: Optional[asyncio.Semaphore] = None,
+                 executor: Optional[Executor] = None) -> None:
+        """Init method of AsyncGithubOrgClient"""
+        self._org_name = org_name
+        self._transport = transport
+        self._max_concurrency = max_concurrency
+        self._semaphore = semaphore or asyncio.BoundedSemaphore(
+            max_concurrency)
+        self._executor = executor
+        self._owns_executor = False
+
+    @property
+    def executor(self) -> Executor:
+        """Executor the requests are sent from"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self._max_concurrency, thread_name_prefix="github")
+            self._owns_executor = True
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the executor the client started, if any"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._owns_executor = False
+
+    async def __aenter__(self) -> "AsyncGithubOrgClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    async def _get_json_page(
+            self, url: str,
+            params: Optional[Dict] = None) -> Tuple[Any, Dict]:
+        """get_json_page in an executor thread under the semaphore.
+        Identical requests awaited at the same time, by any client on the
+        running loop, share one thread and one semaphore slot.
+        """
+        async def call() -> Tuple[Any, Dict]:
+            async with self._semaphore:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.executor, partial(
+                        get_json_page, url, params, self._transport))
+
+        return await INFLIGHT.run_async(
+            INFLIGHT.key(url, params, self._transport), call)
+
+    @memoize
+    async def org(self) -> Dict:
+        """Memoize org"""
+        org, _ = await self._get_json_page(
+            self.ORG_URL.format(org=self._org_name))
+        return org
+
+    @memoize
+    async def repos_payload(self) -> List[Dict]:
+        """Memoize repos payload.
+        Fetches the first page, then the remaining pages concurrently.
+        """
+        org = await self.org
+        first, links = await self._get_json_page(
+            org["repos_url"], {"per_page": self.PER_PAGE})
+        urls = page_urls(links)
+        if urls:
+            pages = await asyncio.gather(*(
+                self._get_json_page(url) for url in urls))
+        else:
+            pages = []
+            while "next" in links:
+                page, links = await self._get_json_page(links["next"]["url"])
+                pages.append((page, links))
+        repos = list(first)
+        for page, _ in pages:
+            repos.extend(page)
+        return repos
+
+    async def public_repos(self, license: str = None) -> List[str]:
+        """Public repos"""
+        return [
+            repo["name"] for repo in await self.repos_payload
+            if license is None or GithubOrgClient.has_license(repo, license)
+        ]
+
+
+class OrgResult(NamedTuple):
+    """Outcome of one org of a GithubOrgBatch"""
+    org_name: str
+    org: Optional[Dict]
+    repos: Optional[List[str]]
+    error: Optional[Exception]
+
+
+class GithubOrgBatch:
+    """Concurrent scan of many Github orgs
+    Resolves the org and public repos of every org with at most
+    ``max_concurrency`` requests in flight across all of them, sent from
+    a pool of as many threads, and yields an ``OrgResult`` per org as
+    soon as it completes. An org that fails yields its error instead of
+    stopping the scan.
+    Example
+    -------
+    >>> async for result in GithubOrgBatch(["google", "abc"]):
+    ...     print(result.org_name, result.error or len(result.repos))
+    abc 3
+    google 9
+    """
+
+    def __init__(self, org_names: Iterable[str], max_concurrency: int = 16,
+                 license: str = None,
+                 transport: Optional[Transport] = None) -> None:
+        """Init method of GithubOrgBatch"""
+        self._org_names = org_names
+        self._max_concurrency = max_concurrency
+        self._license = license
+        self._transport = transport
+
+    def __aiter__(self) -> AsyncIterator[OrgResult]:
+        return self._results()
+
+    async def _scan(self, org_name: str, semaphore: asyncio.Semaphore,
+                    executor: Executor) -> OrgResult:
+        """Resolve one org, catching its error"""
+        client = AsyncGithubOrgClient(
+            org_name, transport=self._transport, semaphore=semaphore,
+            executor=executor)
+        try:
+            org = await client.org
+            repos = await client.public_repos(self._license)
+        except Exception as error:
+            return OrgResult(org_name, None, None, error)
+        return OrgResult(org_name, org, repos, None)
+
+    async def _results(self) -> AsyncIterator[OrgResult]:
+        """Scan orgs with one worker per allowed request"""
+        semaphore = asyncio.BoundedSemaphore(self._max_concurrency)
+        executor = ThreadPoolExecutor(self._max_concurrency,
+                                      thread_name_prefix="github")
+        org_names = iter(self._org_names)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker() -> None:
+            """Scan orgs until there are none left"""
+            try:
+                for org_name in org_names:
+                    await results.put(await self._scan(
+                        org_name, semaphore, executor))
+            finally:
+                await results.put(None)
+
+        workers = [asyncio.create_task(worker())
+                   for _ in range(self._max_concurrency)]
+        running = len(workers)
         try:
-            has_license = access_nested_map(repo, ("license", "key")) == license_key
-        except KeyError:
-            return False
-        return has_license
+            while running:
+                result = await results.get()
+                if result is None:
+                    running -= 1
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            executor.shutdown(wait=False)
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""Local stand-in for the GitHub API, served from fixtures.py data.
+Run it standalone for load tests:
+    ./fake_github.py --port 8000 --latency 0.05 --repeat 100
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.parse import parse_qs, urlsplit
+
+from fixtures import TEST_PAYLOAD
+
+__all__ = [
+    "FakeGithub",
+]
+
+REASONS = {200: "OK", 304: "Not Modified", 401: "Unauthorized",
+           403: "Forbidden",
+           404: "Not Found", 429: "Too Many Requests",
+           500: "Internal Server Error", 502: "Bad Gateway",
+           503: "Service Unavailable"}
+SORT_KEYS = {"created": "created_at", "updated": "updated_at",
+             "pushed": "pushed_at", "full_name": "full_name"}
+
+
+def fixture_repos(repeat: int = 1) -> List[Dict]:
+    """The fixture repos, repeated with unique names when repeat > 1"""
+    repos = TEST_PAYLOAD[0][1]
+    if repeat == 1:
+        return list(repos)
+    return [dict(repo, id=repo["id"] * repeat + i,
+                 name="{}-{}".format(repo["name"], i))
+            for i in range(repeat) for repo in repos]
+
+
+class FakeGithub:
+    """Fake GitHub API server running on its own event loop thread.
+    Serves ``GET /orgs/{org}`` and the paginated ``GET /orgs/{org}/repos``
+    for every org of ``orgs`` (``google`` with the fixture repos by
+    default), and the authenticated ``POST /graphql`` queries built by
+    ``bulk.build_query``, over HTTP/1.1 keep-alive connections, with:
+    - ``latency`` seconds, plus up to ``jitter``, before each response
+    - ``per_page`` repos per page by default, ``Link`` headers and the
+      ``page``, ``per_page``, ``sort`` and ``direction`` parameters
+    - ``X-RateLimit-*`` headers counting ``rate_limit`` requests per
+      ``Authorization`` header and ``rate_window`` seconds, and a 403 once
+      they are used up
+    - a ``error_rate`` share of 502 responses, and the statuses queued
+      with ``fail_next``, served first
+    - ``ETag`` headers, with 304 answers to matching ``If-None-Match``
+    Responses are encoded once and reused, so replace rather than mutate
+    the repos list of an org to change it.
+    Example
+    -------
+    >>> with FakeGithub(latency=0.01, per_page=5) as server:
+    ...     class Client(GithubOrgClient):
+    ...         ORG_URL = server.org_url
+    ...     Client("google").public_repos()
+    """
+
+    def __init__(self, orgs: Optional[Dict[str, List[Dict]]] = None,
+                 host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 per_page: int = 30, rate_limit: int = 5000,
+                 rate_window: float = 3600.0, error_rate: float = 0.0,
+                 etags: bool = True) -> None:
+        """Init method of FakeGithub"""
+        self.orgs = {"google": fixture_repos()} if orgs is None else orgs
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.per_page = per_page
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.error_rate = error_rate
+        self.etags = etags
+        self.requests: Counter = Counter()
+        self._failures: deque = deque()
+        self._bodies: Dict[Tuple, Tuple[object, bytes, str]] = {}
+        self._quota: Dict[Optional[str], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connections: Dict[asyncio.Task, Any] = {}
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server"""
+        return "http://{}:{}".format(self.host, self.port)
+
+    @property
+    def org_url(self) -> str:
+        """ORG_URL template for clients of the server"""
+        return self.url + "/orgs/{org}"
+
+    def fail_next(self, *statuses: int) -> None:
+        """Answer the next requests with statuses, in order"""
+        with self._lock:
+            self._failures.extend(statuses)
+
+    def start(self) -> "FakeGithub":
+        """Start serving in a daemon thread"""
+        started = threading.Event()
+
+        def serve() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port,
+                                     backlog=4096))
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and join the server thread"""
+        async def close() -> None:
+            self._server.close()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._loop.stop()
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.create_task, close())
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self) -> "FakeGithub":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one keep-alive connection"""
+        connection = asyncio.current_task()
+        self._connections[connection] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                method, target, _ = request_line.decode("latin-1").split()
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+                delay = self.latency + random.uniform(0, self.jitter)
+                if delay:
+                    await asyncio.sleep(delay)
+                try:
+                    status, response_headers, body = self._respond(
+                        method, target, headers, body)
+                except Exception as error:
+                    status, response_headers = 500, {}
+                    body = self._json({"message": repr(error)})
+                head = ["HTTP/1.1 {} {}".format(status, REASONS[status])]
+                response_headers["Content-Length"] = str(len(body))
+                head.extend("{}: {}".format(*item)
+                            for item in response_headers.items())
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode()
+                             + body)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, ValueError,
+                asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self._connections[connection]
+            writer.close()
+
+    def _respond(self, method: str, target: str, headers: Dict[str, str],
+                 body: bytes = b"") -> Tuple[int, Dict, bytes]:
+        """Status, headers and body answering one request"""
+        parts = urlsplit(target)
+        query = {key: values[-1] for key, values in
+                 parse_qs(parts.query).items()}
+        with self._lock:
+            self.requests[parts.path] += 1
+            failure = self._failures.popleft() if self._failures else None
+        response_headers = {"Content-Type": "application/json"}
+        if failure is None and random.random() < self.error_rate:
+            failure = 502
+        if failure is not None:
+            return failure, response_headers, self._json(
+                {"message": REASONS[failure]})
+        response_headers.update(self._rate_limit(headers.get("authorization")))
+        if response_headers["X-RateLimit-Remaining"] == "-1":
+            response_headers["X-RateLimit-Remaining"] = "0"
+            return 403, response_headers, self._json(
+                {"message": "API rate limit exceeded"})
+        if parts.path == "/graphql" and method == "POST":
+            if "authorization" not in headers:
+                return 401, response_headers, self._json({
+                    "message": "This endpoint requires you to be "
+                               "authenticated."})
+            return 200, response_headers, self._json(
+                self._graphql(json.loads(body)))
+        path = parts.path.strip("/").split("/")
+        if method != "GET" or len(path) not in (2, 3) or path[0] != "orgs" \
+                or path[1] not in self.orgs or (
+                    len(path) == 3 and path[2] != "repos"):
+            return 404, response_headers, self._json({"message": "Not Found"})
+        if len(path) == 2:
+            body, etag = self._org(path[1])
+        else:
+            body, etag = self._repos_page(path[1], parts.path, query,
+                                          response_headers)
+        if self.etags:
+            response_headers["ETag"] = etag
+            if headers.get("if-none-match") == etag:
+                response_headers.update(self._rate_limit(
+                    headers.get("authorization"), -1))
+                return 304, response_headers, b""
+        return 200, response_headers, body
+
+    def _org(self, org: str) -> Tuple[bytes, str]:
+        """Body and ETag of the org payload"""
+        return self._cached(("org", org), self.orgs[org], lambda: dict(
+            TEST_PAYLOAD[0][0], login=org,
+            repos_url="{}/orgs/{}/repos".format(self.url, org)))
+
+    def _repos_page(self, org: str, path: str, query: Dict[str, str],
+                    response_headers: Dict[str, str]) -> Tuple[bytes, str]:
+        """Body and ETag of one page of the repos of org, setting the
+        Link header"""
+        repos = self.orgs[org]
+        sort = SORT_KEYS.get(query.get("sort", ""))
+        direction = query.get("direction",
+                              "asc" if sort == "full_name" else "desc")
+        per_page = min(int(query.get("per_page", self.per_page)), 100)
+        page = max(int(query.get("page", 1)), 1)
+        last = max(-(-len(repos) // per_page), 1)
+        links = []
+        for rel, number in (("prev", page - 1), ("next", page + 1),
+                            ("first", 1), ("last", last)):
+            if 1 <= number <= last and number != page:
+                params = dict(query, page=str(number), per_page=str(per_page))
+                links.append('<{}{}?{}>; rel="{}"'.format(
+                    self.url, path, "&".join(
+                        "{}={}".format(*item) for item in params.items()),
+                    rel))
+        if links:
+            response_headers["Link"] = ", ".join(links)
+
+        def build() -> List[Dict]:
+            ordered = repos
+            if sort is not None:
+                ordered = sorted(repos, key=lambda repo: repo.get(sort) or "",
+                                 reverse=direction == "desc")
+            return ordered[(page - 1) * per_page:page * per_page]
+        return self._cached((org, sort, direction, per_page, page), repos,
+                            build)
+
+    def _graphql(self, request: Dict) -> Dict:
+        """Answer a query of bulk.build_query, paging repos by offset"""
+        first = int(re.search(r"first: (\d+)", request["query"]).group(1))
+        variables = request.get("variables") or {}
+        data: Dict[str, Any] = {}
+        errors = []
+        i = 0
+        while "login{}".format(i) in variables:
+            login, alias = variables["login{}".format(i)], "org{}".format(i)
+            start = int(variables.get("after{}".format(i)) or 0)
+            i += 1
+            if login not in self.orgs:
+                data[alias] = None
+                errors.append({
+                    "type": "NOT_FOUND", "path": [alias],
+                    "message": "Could not resolve to an Organization with "
+                               "the login of '{}'.".format(login)})
+                continue
+            repos = self.orgs[login][start:start + first]
+            end = start + len(repos)
+            data[alias] = {
+                "login": login,
+                "name": TEST_PAYLOAD[0][0].get("name"),
+                "description": TEST_PAYLOAD[0][0].get("description"),
+                "url": "https://github.com/" + login,
+                "repositories": {
+                    "pageInfo": {"hasNextPage": end < len(self.orgs[login]),
+                                 "endCursor": str(end)},
+                    "nodes": [{
+                        "name": repo["name"],
+                        "updatedAt": repo.get("updated_at"),
+                        "owner": {"login": repo["owner"]["login"]},
+                        "licenseInfo": repo.get("license") and {
+                            "key": repo["license"]["key"]},
+                    } for repo in repos],
+                },
+            }
+        payload: Dict[str, Any] = {"data": data}
+        if errors:
+            payload["errors"] = errors
+        return payload
+
+    def _cached(self, key: Tuple, source: object,
+                build: Callable[[], object]) -> Tuple[bytes, str]:
+        """Serialized body and ETag of build(), kept until the source
+        list of the org is replaced so that hot pages are encoded once"""
+        with self._lock:
+            cached = self._bodies.get(key)
+        if cached is None or cached[0] is not source:
+            body = json.dumps(build()).encode()
+            cached = (source, body,
+                      'W/"{}"'.format(hashlib.md5(body).hexdigest()))
+            with self._lock:
+                self._bodies[key] = cached
+        return cached[1], cached[2]
+
+    def _rate_limit(self, token: Optional[str],
+                    count: int = 1) -> Dict[str, str]:
+        """Count count requests of token and return the rate limit
+        headers, with a remaining count of -1 once the limit is exceeded"""
+        now = time.time()
+        with self._lock:
+            used, reset = self._quota.get(token, (0, now + self.rate_window))
+            if reset <= now:
+                used, reset = 0, now + self.rate_window
+            used += count
+            self._quota[token] = (used, reset)
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(self.rate_limit - used, -1)),
+            "X-RateLimit-Used": str(used),
+            "X-RateLimit-Reset": str(int(reset)),
+        }
+
+    @staticmethod
+    def _json(payload: object) -> bytes:
+        return json.dumps(payload).encode()
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    """Serve the fixture org until interrupted"""
+    parser = argparse.ArgumentParser(description="Fake GitHub API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--per-page", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="repeat the fixture repos this many times")
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    server = FakeGithub({"google": fixture_repos(args.repeat)},
+                        args.host, args.port, args.latency, args.jitter,
+                        args.per_page, args.rate_limit,
+                        error_rate=args.error_rate).start()
+    print("Serving the fake GitHub API on {}".format(server.url))
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
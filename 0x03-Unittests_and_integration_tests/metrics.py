@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Request and cache instrumentation for github org client.
+"""
+import threading
+from bisect import bisect_left
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+__all__ = [
+    "Histogram",
+    "Metrics",
+    "active",
+    "disable",
+    "enable",
+]
+
+Labels = Tuple[Tuple[str, str], ...]
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                    5.0, 10.0)
+
+# Registry the hooks of utils report to, None while disabled
+active: Optional["Metrics"] = None
+
+
+class Histogram:
+    """Cumulative histogram over fixed upper bounds"""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        """Init method of Histogram"""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Count value in the first bucket whose bound is not below it"""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Cumulative counts by upper bound, ending with +Inf"""
+        total, buckets = 0, []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+
+class Metrics:
+    """In-process registry of counters, gauges and histograms.
+    Once made ``active`` with ``enable``, ``utils`` reports every HTTP
+    request (latency, status, bytes, rate limit headroom), retry and
+    cache lookup to it. Read the values with ``snapshot`` or
+    ``prometheus``, or receive each event as a dict in ``callbacks``.
+    Example
+    -------
+    >>> registry = enable(Metrics(callbacks=[print]))
+    >>> get_json("https://api.github.com/orgs/google")
+    {'event': 'request', 'host': 'api.github.com', 'status': 200, ...}
+    >>> print(registry.prometheus())
+    # TYPE github_requests_total counter
+    github_requests_total{host="api.github.com",status="200"} 1
+    ...
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS,
+                 callbacks: Iterable[Callable[[Dict], Any]] = ()) -> None:
+        """Init method of Metrics"""
+        self.buckets = tuple(sorted(buckets))
+        self.callbacks = list(callbacks)
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._caches: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add value to a counter"""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        """Set a gauge"""
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Add value to a histogram"""
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def track(self, name: str, cache: Any) -> None:
+        """Export the ``stats()`` of cache, such as a MemoCache, as gauges
+        read at snapshot time"""
+        self._caches[name] = cache
+
+    def emit(self, event: Dict) -> None:
+        """Pass event to every callback"""
+        for callback in self.callbacks:
+            callback(event)
+
+    def record_response(self, url: str, response: Any, seconds: float,
+                        stream: bool = False) -> None:
+        """Record a response received after seconds"""
+        host = urlsplit(url).netloc
+        status = response.status_code
+        if stream:
+            size = int(response.headers.get("Content-Length") or 0)
+        else:
+            size = len(response.content)
+        self.inc("github_requests_total", host=host, status=status)
+        self.inc("github_response_bytes_total", size, host=host)
+        self.observe("github_request_duration_seconds", seconds, host=host)
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None:
+            self.set("github_ratelimit_remaining", int(remaining), host=host)
+            self.set("github_ratelimit_limit",
+                     int(response.headers.get("X-RateLimit-Limit", 0)),
+                     host=host)
+        if self.callbacks:
+            self.emit({"event": "request", "host": host, "status": status,
+                       "seconds": seconds, "bytes": size,
+                       "ratelimit_remaining": remaining})
+
+    def record_error(self, url: str, error: Exception,
+                     seconds: float) -> None:
+        """Record a request that failed without a response"""
+        host = urlsplit(url).netloc
+        self.inc("github_requests_total", host=host, status="error")
+        self.observe("github_request_duration_seconds", seconds, host=host)
+        if self.callbacks:
+            self.emit({"event": "request", "host": host, "status": "error",
+                       "seconds": seconds, "error": repr(error)})
+
+    def record_retry(self, url: str, reason: str) -> None:
+        """Record a retry of url, after a failure or a rate limit"""
+        host = urlsplit(url).netloc
+        self.inc("github_request_retries_total", host=host, reason=reason)
+        if self.callbacks:
+            self.emit({"event": "retry", "host": host, "reason": reason})
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        """Record a lookup in cache"""
+        result = "hit" if hit else "miss"
+        self.inc("github_cache_lookups_total", cache=cache, result=result)
+        if self.callbacks:
+            self.emit({"event": "cache", "cache": cache, "hit": hit})
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current values, by metric name then by ``k=v,...`` labels"""
+        result: Dict[str, Dict[str, Any]] = {}
+        for (name, labels), value in self._collect():
+            if isinstance(value, Histogram):
+                value = {"count": value.count, "sum": value.sum,
+                         "buckets": value.buckets()}
+            result.setdefault(name, {})[",".join(
+                "{}={}".format(*label) for label in labels)] = value
+        return result
+
+    def prometheus(self) -> str:
+        """Current values in the Prometheus text exposition format"""
+        lines: List[str] = []
+        typed = set()
+        for (name, labels), value in self._collect():
+            if name not in typed:
+                typed.add(name)
+                lines.append("# TYPE {} {}".format(name, _type(name, value)))
+            if not isinstance(value, Histogram):
+                lines.append(_sample(name, labels, value))
+                continue
+            for bound, count in value.buckets():
+                lines.append(_sample(name + "_bucket", labels + (
+                    ("le", "+Inf" if bound == float("inf") else repr(bound)),
+                ), count))
+            lines.append(_sample(name + "_sum", labels, value.sum))
+            lines.append(_sample(name + "_count", labels, value.count))
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Forget every recorded value"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def _collect(self) -> List[Tuple[Tuple[str, Labels], Any]]:
+        """Every metric, sorted by name and labels"""
+        with self._lock:
+            items = [*self._counters.items(), *self._gauges.items(),
+                     *((key, _copy(histogram)) for key, histogram
+                       in self._histograms.items())]
+        for cache_name, cache in self._caches.items():
+            for stat, value in cache.stats().items():
+                items.append((("github_memo_cache_" + stat,
+                               (("cache", cache_name),)), value))
+        return sorted(items, key=lambda item: item[0])
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    """Hashable, sorted label pairs"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _copy(histogram: Histogram) -> Histogram:
+    """Copy of histogram, taken with the registry lock held"""
+    copy = Histogram(histogram.bounds)
+    copy.counts = list(histogram.counts)
+    copy.sum, copy.count = histogram.sum, histogram.count
+    return copy
+
+
+def _type(name: str, value: Any) -> str:
+    """Prometheus type of a metric"""
+    if isinstance(value, Histogram):
+        return "histogram"
+    return "counter" if name.endswith("_total") else "gauge"
+
+
+def _sample(name: str, labels: Labels, value: float) -> str:
+    """One exposition line"""
+    if labels:
+        name += "{{{}}}".format(",".join(
+            '{}="{}"'.format(key, label.replace("\\", "\\\\")
+                             .replace('"', '\\"'))
+            for key, label in labels))
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return "{} {}".format(name, value)
+
+
+def enable(registry: Optional[Metrics] = None) -> Metrics:
+    """Make registry, or a new one, the active registry and return it"""
+    global active
+    active = Metrics() if registry is None else registry
+    return active
+
+
+def disable() -> None:
+    """Stop recording; the hooks cost a single check afterwards"""
+    global active
+    active = None
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Rate-limit-aware request scheduling for github org client.
+"""
+import asyncio
+import random
+import requests
+import threading
+import time
+from typing import (
+    Dict,
+    Optional,
+)
+
+__all__ = [
+    "RateLimiter",
+    "is_rate_limited",
+]
+
+
+def is_rate_limited(response: requests.Response) -> bool:
+    """Whether response was refused by a primary or secondary rate limit.
+    """
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    headers = response.headers
+    return ("Retry-After" in headers
+            or headers.get("X-RateLimit-Remaining") == "0"
+            or "rate limit" in response.text.lower())
+
+
+class _Bucket:
+    """Token bucket state of one API token"""
+    __slots__ = ("tokens", "rate", "capacity", "updated", "blocked_until")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.tokens = capacity
+        self.rate = rate
+        self.capacity = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    """Token bucket scheduler driven by the GitHub rate limit headers.
+    Each API token gets a bucket that starts at ``rate`` requests per
+    second with bursts of ``burst``. Every response re-paces its bucket so
+    that the remaining quota lasts until the reset time, and a refused
+    request blocks the bucket until ``Retry-After``, the reset time or a
+    jittered exponential backoff has passed. ``acquire`` blocks the calling
+    thread, ``acquire_async`` only the calling coroutine.
+    Example
+    -------
+    >>> limiter = RateLimiter()
+    >>> transport = Transport(headers={"Authorization": "token ..."},
+    ...                       limiter=limiter)
+    """
+
+    def __init__(self, rate: float = 5000 / 3600, burst: int = 10,
+                 max_retries: int = 5, backoff: float = 1.0,
+                 max_backoff: float = 60.0) -> None:
+        """Init method of RateLimiter"""
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._buckets: Dict[Optional[str], _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, token: Optional[str]) -> _Bucket:
+        """Bucket of token, with the lock held"""
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            bucket = self._buckets[token] = _Bucket(self.rate, self.burst)
+        return bucket
+
+    def reserve(self, token: Optional[str] = None) -> float:
+        """Take a token and return how long to wait before using it"""
+        with self._lock:
+            bucket = self._bucket(token)
+            now = time.monotonic()
+            bucket.tokens = min(
+                bucket.capacity,
+                bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            bucket.tokens -= 1
+            delay = max(0.0, bucket.blocked_until - now)
+            if bucket.tokens < 0:
+                delay = max(delay, -bucket.tokens / bucket.rate)
+            return delay
+
+    def acquire(self, token: Optional[str] = None) -> None:
+        """Wait until a request may be sent with token"""
+        delay = self.reserve(token)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self, token: Optional[str] = None) -> None:
+        """Wait until a request may be sent with token, asynchronously"""
+        delay = self.reserve(token)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def update(self, response: requests.Response,
+               token: Optional[str] = None) -> None:
+        """Re-pace the bucket of token from the headers of response"""
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        remaining = int(remaining)
+        window = max(float(reset) - time.time(), 1.0)
+        with self._lock:
+            bucket = self._bucket(token)
+            bucket.rate = max(remaining / window, 1 / window)
+            bucket.capacity = max(1, min(self.burst, remaining))
+            bucket.tokens = min(bucket.tokens, remaining)
+            if remaining == 0:
+                bucket.blocked_until = time.monotonic() + window
+
+    def retry_delay(self, response: requests.Response, attempt: int,
+                    token: Optional[str] = None) -> float:
+        """Block token until a rate limited response may be retried.
+        Every request with token, including the retry, waits for it in
+        ``acquire``.
+        """
+        retry_after = response.headers.get("Retry-After")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if retry_after is not None:
+            delay = float(retry_after)
+        elif response.headers.get("X-RateLimit-Remaining") == "0" and reset:
+            delay = max(float(reset) - time.time(), 0.0)
+        else:
+            delay = random.uniform(
+                0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        with self._lock:
+            bucket = self._bucket(token)
+            bucket.blocked_until = max(bucket.blocked_until,
+                                       time.monotonic() + delay)
+        return delay
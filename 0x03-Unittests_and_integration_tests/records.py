@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Compact repo records for github org client.
+"""
+import sys
+from functools import lru_cache
+from typing import (
+    Any,
+    Dict,
+    Sequence,
+    Tuple,
+)
+
+from utils import compile_path
+
+__all__ = [
+    "DEFAULT_FIELDS",
+    "Record",
+    "Repo",
+    "record_type",
+]
+
+DEFAULT_FIELDS = ("name", "license.key", "owner.login", "updated_at")
+INTERNED = frozenset(("license_key", "owner_login", "language",
+                      "visibility", "default_branch"))
+
+
+class Record:
+    """Base of the compact record types built by ``record_type``.
+    """
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _getters: Tuple[Tuple[str, Any], ...] = ()
+
+    @classmethod
+    def from_json(cls, payload: Dict) -> "Record":
+        """Project a GitHub JSON object on the record fields"""
+        record = cls.__new__(cls)
+        for attr, getter in cls._getters:
+            value = getter(payload)
+            if attr in INTERNED and type(value) is str:
+                value = sys.intern(value)
+            setattr(record, attr, value)
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Attribute values by attribute name"""
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return "{}({})".format(type(self).__name__, ", ".join(
+            "{}={!r}".format(attr, getattr(self, attr))
+            for attr in self.__slots__))
+
+
+def record_type(fields: Sequence[str] = DEFAULT_FIELDS) -> type:
+    """Build a ``__slots__`` record type keeping only fields.
+    Fields are dotted key paths of the GitHub JSON; each becomes an
+    attribute named after its path with dots replaced by underscores,
+    ``None`` when missing. Repeated strings such as license keys and owner
+    logins are interned. ``name`` and ``license.key`` are always kept.
+    Example
+    -------
+    >>> Repo = record_type(("name", "license.key", "stargazers_count"))
+    >>> Repo.from_json({"name": "a", "license": None})
+    Repo(name='a', license_key=None, stargazers_count=None)
+    """
+    return _record_type(
+        tuple(dict.fromkeys(("name", "license.key") + tuple(fields))))
+
+
+@lru_cache(maxsize=None)
+def _record_type(fields: Tuple[str, ...]) -> type:
+    """record_type, built once per fields"""
+    attrs = tuple(field.replace(".", "_") for field in fields)
+    getters = tuple(
+        (attr, compile_path(field.split("."), default=None))
+        for attr, field in zip(attrs, fields))
+    return type("Repo", (Record,), {
+        "__slots__": attrs,
+        "_fields": fields,
+        "_getters": getters,
+    })
+
+
+Repo = record_type()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Retry policies and circuit breaking for github org client.
+"""
+import random
+import requests
+import threading
+import time
+from typing import (
+    Collection,
+    Dict,
+    Optional,
+)
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "RetryPolicy",
+]
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open.
+    """
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        """Init method of CircuitOpenError"""
+        super().__init__("circuit open for {}, retry in {:.1f}s".format(
+            host, retry_in))
+        self.host = host
+        self.retry_in = retry_in
+
+
+class RetryPolicy:
+    """Exponential backoff retries for transient failures.
+    Only requests with an idempotent ``method`` are retried, after a
+    connection error, a timeout or one of the ``statuses`` responses, at
+    most ``max_retries`` times. The n-th retry waits a random time between
+    zero and ``min(max_backoff, backoff * 2 ** n)`` seconds.
+    Example
+    -------
+    >>> transport = Transport(retry=RetryPolicy(max_retries=5))
+    """
+    IDEMPOTENT_METHODS = frozenset(
+        ("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+    def __init__(self, max_retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 30.0,
+                 statuses: Collection[int] = (500, 502, 503, 504)) -> None:
+        """Init method of RetryPolicy"""
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+
+    def is_failure(self, response: Optional[requests.Response] = None,
+                   error: Optional[Exception] = None) -> bool:
+        """Whether a response or error is a transient failure"""
+        if error is not None:
+            return isinstance(error, (requests.ConnectionError,
+                                      requests.Timeout))
+        return response.status_code in self.statuses
+
+    def should_retry(self, method: str, attempt: int) -> bool:
+        """Whether attempt, counted from 0, may be followed by a retry"""
+        return (method.upper() in self.IDEMPOTENT_METHODS
+                and attempt < self.max_retries)
+
+    def delay(self, attempt: int) -> float:
+        """Jittered backoff before the retry following attempt"""
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker.
+    After ``failure_threshold`` consecutive failures a host's circuit
+    opens and requests to it fail fast with ``CircuitOpenError``. Once
+    ``reset_timeout`` seconds have passed a single trial request is let
+    through: its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0) -> None:
+        """Init method of CircuitBreaker"""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trials: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def state(self, host: str) -> str:
+        """closed, open or half-open"""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return "closed"
+            if time.monotonic() - opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+    def before_request(self, host: str) -> None:
+        """Raise CircuitOpenError unless a request to host may be sent"""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return
+            elapsed = time.monotonic() - opened_at
+            if elapsed >= self.reset_timeout and not self._trials.get(host):
+                self._trials[host] = True
+                return
+            raise CircuitOpenError(
+                host, max(self.reset_timeout - elapsed, 0.0))
+
+    def record_success(self, host: str) -> None:
+        """Close the circuit of host"""
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._trials.pop(host, None)
+
+    def release(self, host: str) -> None:
+        """End a trial request of host without an outcome, letting the
+        next request be the trial"""
+        with self._lock:
+            self._trials.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        """Count a failure of host, opening its circuit at the threshold"""
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if self._trials.pop(host, False) or (
+                    failures >= self.failure_threshold):
+                self._opened_at[host] = time.monotonic()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Incremental JSON array parsing for github org client.
+"""
+import codecs
+import json
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+)
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - depends on the environment
+    ijson = None
+
+__all__ = [
+    "iter_json_array",
+]
+
+Fields = Optional[Sequence[Sequence[str]]]
+
+
+def iter_json_array(chunks: Iterable[bytes], fields: Fields = None,
+                    backend: str = "python") -> Iterator[Dict]:
+    """Parse a JSON array of objects incrementally from byte chunks.
+    Each object is yielded as soon as it is complete, projected on the
+    scalar ``fields`` key paths when given, so that only one object is
+    held in memory at a time. The default ``"python"`` backend decodes
+    one element at a time with the C accelerated ``json`` scanner; the
+    ``"ijson"`` backend, when installed, never builds the fields that are
+    not projected, which bounds memory even for huge single elements but
+    is slower on GitHub-sized repos.
+    Example
+    -------
+    >>> chunks = [b'[{"name": "a", "license": {"key": "mit", "name": "M',
+    ...           b'IT"}, "owner": {"login": "google"}}]']
+    >>> list(iter_json_array(chunks, [("name",), ("license", "key")]))
+    [{'name': 'a', 'license': {'key': 'mit'}}]
+    """
+    if backend == "ijson":
+        if ijson is None:
+            raise ImportError("the ijson backend needs ijson installed")
+        return _iter_ijson(chunks, fields)
+    return _iter_python(chunks, fields)
+
+
+def _project(record: Dict, fields: Sequence[Sequence[str]]) -> Dict:
+    """Keep only the values at fields of record"""
+    projected: Dict = {}
+    for path in fields:
+        value: Any = record
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            _set_path(projected, path, value)
+    return projected
+
+
+def _set_path(record: Dict, path: Sequence[str], value: Any) -> None:
+    """Set value at path of record, creating the parent objects"""
+    for key in path[:-1]:
+        record = record.setdefault(key, {})
+    record[path[-1]] = value
+
+
+def _iter_python(chunks: Iterable[bytes], fields: Fields) -> Iterator[Dict]:
+    """Pure Python backend, decoding one array element at a time"""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    started = exhausted = False
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and not started:
+            if buffer[position] != "[":
+                raise ValueError("expected a JSON array")
+            started = True
+            position += 1
+            continue
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        if position < len(buffer):
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                end = None
+            if end is not None and (end < len(buffer) or exhausted):
+                position = end
+                yield element if fields is None else _project(element, fields)
+                continue
+        if exhausted:
+            raise ValueError("truncated JSON array")
+        buffer = buffer[position:]
+        position = 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer += utf8.decode(b"", final=True)
+        else:
+            buffer += utf8.decode(chunk)
+
+
+class _ChunkReader:
+    """File-like reader over byte chunks, as ijson expects"""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+
+    def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            return b""
+        return next(self._chunks, b"")
+
+
+def _iter_ijson(chunks: Iterable[bytes], fields: Fields) -> Iterator[Dict]:
+    """ijson backend, building only the projected values"""
+    reader = _ChunkReader(chunk for chunk in chunks if chunk)
+    if fields is None:
+        yield from ijson.items(reader, "item", use_float=True)
+        return
+    wanted = {".".join(("item",) + tuple(path)): path for path in fields}
+    record: Dict = {}
+    for prefix, event, value in ijson.parse(reader, use_float=True):
+        if prefix == "item":
+            if event == "start_map":
+                record = {}
+            elif event == "end_map":
+                yield record
+        elif prefix in wanted and event not in (
+                "start_map", "map_key", "end_map", "start_array",
+                "end_array"):
+            _set_path(record, wanted[prefix], value)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Topic: Unittests and Integration Tests
+Author: Khotso Selading
+Date: 01-02-2024
+"""
+
+import unittest
+from bulk import GraphqlError, build_query, fetch_orgs
+from client import GithubOrgClient, GraphqlGithubOrgClient
+from fake_github import FakeGithub, fixture_repos
+from fixtures import TEST_PAYLOAD
+from parameterized import parameterized
+from unittest.mock import patch
+from utils import Transport
+
+REPOSPAYLOAD = TEST_PAYLOAD[0][1]
+EXPECTED_REPOS = TEST_PAYLOAD[0][2]
+APACHE2_REPOS = TEST_PAYLOAD[0][3]
+
+
+class TestFetchOrgs(unittest.TestCase):
+    """
+    TestFetchOrgs
+    """
+
+    def setUp(self):
+        """
+        serve google and abc, and authenticate the transport
+        """
+        self.server = FakeGithub({
+            "google": fixture_repos(),
+            "abc": fixture_repos(3),
+        }).start()
+        self.addCleanup(self.server.stop)
+        self.url = self.server.url + "/graphql"
+        self.transport = Transport(headers={"Authorization": "bearer t"})
+        self.addCleanup(self.transport.close)
+
+    def test_shapes(self):
+        """
+        test that orgs and repos are shaped like the REST payloads
+        """
+        org, repos = fetch_orgs(["google"], self.transport,
+                                url=self.url)["google"]
+        self.assertEqual(org["login"], "google")
+        self.assertEqual(org["repos_url"],
+                         "https://api.github.com/orgs/google/repos")
+        self.assertEqual(len(repos), len(REPOSPAYLOAD))
+        for repo, expected in zip(repos, REPOSPAYLOAD):
+            self.assertEqual(repo["name"], expected["name"])
+            self.assertEqual(repo["license"], expected["license"] and {
+                "key": expected["license"]["key"]})
+            self.assertEqual(repo["owner"]["login"], "google")
+            self.assertEqual(
+                GithubOrgClient.has_license(repo, "apache-2.0"),
+                GithubOrgClient.has_license(expected, "apache-2.0"))
+
+    @parameterized.expand([
+        (10, 4, 7),
+        (1, 4, 10),
+        (10, 100, 1),
+    ])
+    def test_batches(self, batch_size: int, per_page: int, queries: int):
+        """
+        test that orgs share queries until their repos are exhausted
+        """
+        results = fetch_orgs(["google", "abc", "google"], self.transport,
+                             batch_size, per_page, self.url)
+        self.assertEqual(sorted(results), ["abc", "google"])
+        self.assertEqual(len(results["google"][1]), 9)
+        self.assertEqual(len(results["abc"][1]), 27)
+        self.assertEqual(len({repo["name"] for repo in results["abc"][1]}),
+                         27)
+        self.assertEqual(self.server.requests["/graphql"], queries)
+
+    def test_missing_org(self):
+        """
+        test that orgs that do not exist are left out
+        """
+        results = fetch_orgs(["google", "nope"], self.transport,
+                             url=self.url)
+        self.assertEqual(list(results), ["google"])
+
+    @parameterized.expand([
+        ("forbidden", [{"type": "FORBIDDEN", "path": ["org0"],
+                        "message": "Resource not accessible"}],
+         "not accessible"),
+        ("other_alias", [{"type": "NOT_FOUND", "path": ["org1"],
+                          "message": "Could not resolve"}], "resolve"),
+        ("no_errors", [], "No data"),
+    ])
+    def test_null_org(self, _, errors, message):
+        """
+        test that a null org not reported as NOT_FOUND raises GraphqlError
+        """
+        with patch('bulk.post_json', return_value={
+                "data": {"org0": None}, "errors": errors}):
+            with self.assertRaises(GraphqlError) as cm:
+                fetch_orgs(["google"], self.transport, url=self.url)
+        self.assertIn(message, str(cm.exception))
+
+    def test_unauthenticated(self):
+        """
+        test that a response without data raises GraphqlError
+        """
+        with self.assertRaises(GraphqlError) as cm:
+            fetch_orgs(["google"], url=self.url)
+        self.assertIn("authenticated", str(cm.exception))
+
+    def test_build_query(self):
+        """
+        test the aliases and variables of a batched query
+        """
+        query = build_query(2, first=5)
+        self.assertIn("$login1: String!, $after1: String", query)
+        self.assertIn("org1: organization(login: $login1)", query)
+        self.assertIn("repositories(first: 5, after: $after1", query)
+
+
+class TestGraphqlGithubOrgClient(unittest.TestCase):
+    """
+    TestGraphqlGithubOrgClient
+    """
+
+    def setUp(self):
+        """
+        serve the fixture org
+        """
+        self.server = FakeGithub().start()
+        self.addCleanup(self.server.stop)
+
+        class Client(GraphqlGithubOrgClient):
+            GRAPHQL_URL = self.server.url + "/graphql"
+        self.Client = Client
+        self.transport = Transport(headers={"Authorization": "bearer t"})
+        self.addCleanup(self.transport.close)
+
+    def test_public_repos(self):
+        """
+        test that one query serves org, repos and licenses
+        """
+        client = self.Client("google", self.transport)
+        self.assertEqual(client.org["login"], "google")
+        self.assertEqual(client.public_repos(), EXPECTED_REPOS)
+        self.assertEqual(client.public_repos("apache-2.0"), APACHE2_REPOS)
+        self.assertEqual(self.server.requests["/graphql"], 1)
+
+    def test_many(self):
+        """
+        test that many fetches every org in one query
+        """
+        clients = self.Client.many(["google", "nope"], self.transport,
+                                   fields=("name", "license.key"))
+        self.assertEqual(list(clients), ["google"])
+        self.assertEqual(clients["google"].public_repos("apache-2.0"),
+                         APACHE2_REPOS)
+        self.assertEqual(self.server.requests["/graphql"], 1)
+
+    def test_missing_org(self):
+        """
+        test that an org that does not exist raises GraphqlError
+        """
+        with self.assertRaises(GraphqlError):
+            self.Client("nope", self.transport).org
+
+
+if __name__ == "__main__":
+    unittest.main()
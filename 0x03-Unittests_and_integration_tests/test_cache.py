@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Topic: Unittests and Integration Tests
+Author: Khotso Selading
+Date: 01-02-2024
+"""
+
+import os
+import tempfile
+import unittest
+from multiprocessing import Pool
+from parameterized import parameterized
+from unittest.mock import Mock, patch
+from cache import DiskCache
+from fake_github import FakeGithub
+from utils import Transport, get_json
+
+
+def store_many(path: str, start: int) -> None:
+    """
+    Store a few entries from a worker process
+    """
+    cache = DiskCache(path)
+    for i in range(start, start + 20):
+        cache.set("http://example.com/{}".format(i), {"i": i})
+
+
+class TestDiskCache(unittest.TestCase):
+    """
+    TestDiskCache
+    """
+
+    def setUp(self):
+        """
+        open a cache in a temporary directory
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+        self.cache = DiskCache(self.path, ttl=60, max_bytes=100,
+                               ttls={"http://example.com/orgs/": 3600})
+
+    def tearDown(self):
+        """
+        remove the temporary directory
+        """
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_get_set(self):
+        """
+        test that values survive a new cache on the same file
+        """
+        self.cache.set("http://example.com", {"payload": True})
+        self.assertEqual(DiskCache(self.path).get("http://example.com"),
+                         {"payload": True})
+        self.assertIsNone(self.cache.get("http://holberton.io"))
+
+    def test_ttl(self):
+        """
+        test that expired values are not served
+        """
+        self.cache.set("http://example.com", 1, ttl=60)
+        with patch("cache.time.time", return_value=1e12):
+            self.assertIsNone(self.cache.get("http://example.com"))
+
+    @parameterized.expand([
+        ("http://example.com/orgs/google", 3600),
+        ("http://example.com/repos", 60),
+    ])
+    def test_ttl_for(self, key: str, expected: float):
+        """
+        test that the longest matching prefix sets the TTL
+        """
+        self.assertEqual(self.cache.ttl_for(key), expected)
+
+    def test_lru_eviction(self):
+        """
+        test that the least recently read values are evicted first
+        """
+        with patch("cache.time.time", side_effect=range(1, 100)):
+            self.cache.set("a", "x" * 40)
+            self.cache.set("b", "x" * 40)
+            self.cache.get("a")
+            self.cache.set("c", "x" * 40)
+            self.assertIsNone(self.cache.get("b"))
+            self.assertEqual(self.cache.get("a"), "x" * 40)
+            self.assertEqual(self.cache.get("c"), "x" * 40)
+
+    def test_processes(self):
+        """
+        test that several processes can write to one file
+        """
+        cache = DiskCache(self.path, max_bytes=1 << 20)
+        with Pool(4) as pool:
+            pool.starmap(store_many, [(self.path, i * 20) for i in range(4)])
+        for i in range(80):
+            self.assertEqual(cache.get("http://example.com/{}".format(i)),
+                             {"i": i})
+
+    def test_transport_store(self):
+        """
+        test that a transport serves fresh values from its store
+        """
+        transport = Transport(store=self.cache)
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.return_value = Mock(json=lambda: [1], links={},
+                                         status_code=200)
+            get_json("http://example.com", transport)
+            self.assertEqual(get_json("http://example.com", transport), [1])
+            mock_get.assert_called_once()
+
+    def test_transport_store_errors(self):
+        """
+        test that a transport does not store error responses
+        """
+        transport = Transport(store=self.cache)
+        with FakeGithub() as server:
+            url = server.url + "/orgs/google"
+            server.fail_next(502)
+            self.assertEqual(get_json(url, transport),
+                             {"message": "Bad Gateway"})
+            self.assertEqual(get_json(url, transport)["login"], "google")
+            self.assertEqual(self.cache.get(url)["payload"]["login"],
+                             "google")
+            get_json(server.url + "/orgs/nope", transport)
+            self.assertIsNone(self.cache.get(server.url + "/orgs/nope"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,11 +6,19 @@ Author: Khotso Selading
 Date: 01-02-2024
 """
 
+import asyncio
+import json
+import threading
+import time
 import unittest
 from unittest.mock import patch, Mock, MagicMock, PropertyMock
-from client import GithubOrgClient, get_json
+from client import (
+    ORG_CACHE, AsyncGithubOrgClient, CachedGithubOrgClient, GithubOrgBatch,
+    GithubOrgClient, get_json
+)
 from parameterized import parameterized, parameterized_class
-from utils import memoize
+from utils import Transport, memoize
+from fake_github import FakeGithub, fixture_repos
 from fixtures import TEST_PAYLOAD
 from typing import Dict
 
@@ -78,6 +86,14 @@ class TestGithubOrgClient(unittest.TestCase):
             )
         self.assertEqual(result, mock_get_json.return_value)
 
+    @patch('client.get_json')
+    def test_org_transport(self, mock_get_json: MagicMock):
+        """tests that org is fetched through the client transport"""
+        transport = Transport()
+        GithubOrgClient("google", transport).org
+        mock_get_json.assert_called_once_with(
+            "https://api.github.com/orgs/google", transport)
+
     def test_public_repos_url(self):
         """tests the _public_repos_url property"""
         with patch.object(
@@ -102,6 +118,267 @@ class TestGithubOrgClient(unittest.TestCase):
         self.assertEqual(
             GithubOrgClient.has_license(repo, license_key), expected_result)
 
+    @patch('client.get_json_pages')
+    @patch('client.get_json')
+    def test_license_index(self, mock_get_json: MagicMock,
+                           mock_get_json_pages: MagicMock):
+        """tests that the license index is rebuilt after a refresh"""
+        mock_get_json.return_value = ORGPAYLOAD
+        mock_get_json_pages.side_effect = [
+            [REPOSPAYLOAD[:4], REPOSPAYLOAD[4:]], [REPOSPAYLOAD[:1]]]
+        cli = GithubOrgClient("google")
+        with patch.object(GithubOrgClient, "has_license") as mock_license:
+            self.assertEqual(cli.public_repos("apache-2.0"), APACHE2_REPOS)
+            self.assertEqual(cli.public_repos("other"),
+                             ["ios-webkit-debug-proxy", "build-debian-cloud"])
+            self.assertEqual(cli.public_repos("no-license"), [])
+            mock_license.assert_not_called()
+        self.assertEqual(cli.license_index[None], ["google.github.io"])
+        cli.refresh()
+        self.assertEqual(cli.public_repos("apache-2.0"), [])
+        self.assertEqual(cli.public_repos("bsd-3-clause"), ["episodes.dart"])
+        self.assertEqual(mock_get_json.call_count, 2)
+        mock_get_json_pages.assert_called_with(
+            ORGPAYLOAD["repos_url"], {"per_page": 100}, None)
+
+    @patch('client.get_json_pages')
+    @patch('client.get_json')
+    def test_compact_repos(self, mock_get_json: MagicMock,
+                           mock_get_json_pages: MagicMock):
+        """tests that compact records answer like the JSON payload"""
+        mock_get_json.return_value = ORGPAYLOAD
+        mock_get_json_pages.return_value = [REPOSPAYLOAD]
+        cli = GithubOrgClient("google", fields=("name", "license.key"))
+        self.assertEqual(cli.public_repos(), EXPECTED_REPOS)
+        self.assertEqual(cli.public_repos("apache-2.0"), APACHE2_REPOS)
+        self.assertEqual(cli.repos_payload[0].license_key, "bsd-3-clause")
+
+    @patch('utils.requests.get')
+    @patch('client.get_json')
+    def test_sync(self, mock_get_json: MagicMock, mock_get: MagicMock):
+        """tests that sync only pages through the updated repos"""
+        mock_get_json.return_value = ORGPAYLOAD
+        newest = max(repo["updated_at"] for repo in REPOSPAYLOAD)
+        updated = dict(REPOSPAYLOAD[0], updated_at=newest + "1",
+                       license={"key": "apache-2.0"})
+        created = dict(REPOSPAYLOAD[1], name="new-repo",
+                       updated_at=newest + "0")
+        mock_get.side_effect = [
+            Mock(json=lambda: REPOSPAYLOAD, links={}),
+            Mock(json=lambda: [updated, created] + REPOSPAYLOAD[2:],
+                 links={"next": {"url": "http://example.com?page=2"}}),
+        ]
+        cli = GithubOrgClient("google")
+        self.assertEqual(cli.public_repos("bsd-3-clause"), ["episodes.dart"])
+        self.assertEqual(cli.sync(), [updated, created])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(cli.public_repos("bsd-3-clause"), [])
+        self.assertEqual(cli.public_repos("apache-2.0"),
+                         APACHE2_REPOS + ["episodes.dart"])
+        self.assertEqual(cli.public_repos(), EXPECTED_REPOS + ["new-repo"])
+        self.assertEqual(cli.public_repos("bsl-1.0"),
+                         ["cpp-netlib", "new-repo"])
+
+    def test_public_repos_pages(self):
+        """tests that the repos payload holds every page"""
+        with FakeGithub({"google": fixture_repos(5)}) as server:
+            class Client(GithubOrgClient):
+                ORG_URL = server.org_url
+                PER_PAGE = 4
+            cli = Client("google")
+            self.assertEqual(cli.public_repos(),
+                             [repo["name"] for repo in fixture_repos(5)])
+            self.assertEqual(server.requests["/orgs/google/repos"], 12)
+
+    @patch('utils.requests.get')
+    def test_iter_public_repos(self, mock_get: MagicMock):
+        """tests that iter_public_repos follows every page"""
+        next_url = "https://api.github.com/orgs/google/repos?page=2"
+        mock_get.side_effect = [
+            Mock(json=lambda: REPOSPAYLOAD[:4],
+                 links={"next": {"url": next_url}}),
+            Mock(json=lambda: REPOSPAYLOAD[4:], links={}),
+        ]
+        with patch.object(
+            GithubOrgClient, "org", new_callable=PropertyMock
+        ) as cm:
+            cm.return_value = ORGPAYLOAD
+            cli = GithubOrgClient("google")
+            self.assertEqual(list(cli.iter_public_repos()), EXPECTED_REPOS)
+            self.assertEqual(mock_get.call_count, 2)
+
+    @patch('utils.requests.get')
+    def test_iter_public_repos_stream(self, mock_get: MagicMock):
+        """tests that streamed repos are filtered by license"""
+        mock_get.return_value.iter_content.return_value = [
+            json.dumps(REPOSPAYLOAD).encode()]
+        mock_get.return_value.links = {}
+        with patch.object(
+            GithubOrgClient, "org", new_callable=PropertyMock
+        ) as cm:
+            cm.return_value = ORGPAYLOAD
+            cli = GithubOrgClient("google")
+            self.assertEqual(
+                list(cli.iter_public_repos("apache-2.0", stream=True)),
+                APACHE2_REPOS)
+
+
+class TestCachedGithubOrgClient(unittest.TestCase):
+    """
+    TestCachedGithubOrgClient
+    """
+
+    def setUp(self):
+        """empty the shared cache"""
+        ORG_CACHE.clear()
+
+    @patch('client.get_json_pages')
+    @patch('client.get_json')
+    def test_public_repos(self, mock_get_json: MagicMock,
+                          mock_get_json_pages: MagicMock):
+        """tests that clients for the same org share their payloads"""
+        mock_get_json.return_value = ORGPAYLOAD
+        mock_get_json_pages.return_value = [REPOSPAYLOAD]
+        for _ in range(3):
+            cli = CachedGithubOrgClient("google")
+            self.assertEqual(cli.public_repos("apache-2.0"), APACHE2_REPOS)
+        mock_get_json.assert_called_once()
+        mock_get_json_pages.assert_called_once()
+        self.assertEqual(ORG_CACHE.stats()["hits"], 4)
+
+    @patch('client.get_json_pages')
+    @patch('client.get_json')
+    def test_license_index(self, mock_get_json: MagicMock,
+                           mock_get_json_pages: MagicMock):
+        """tests that clients share the license index until a refresh"""
+        mock_get_json.return_value = ORGPAYLOAD
+        mock_get_json_pages.side_effect = [[REPOSPAYLOAD],
+                                           [REPOSPAYLOAD[:1]]]
+        index = CachedGithubOrgClient("google").license_index
+        cli = CachedGithubOrgClient("google")
+        self.assertIs(cli.license_index, index)
+        cli.refresh()
+        self.assertEqual(CachedGithubOrgClient("google").license_index,
+                         {"bsd-3-clause": ["episodes.dart"]})
+
+
+class TestAsyncGithubOrgClient(unittest.IsolatedAsyncioTestCase):
+    """
+    TestAsyncGithubOrgClient
+    """
+
+    @patch('utils.requests.get')
+    async def test_public_repos(self, mock_get: MagicMock):
+        """tests that every page is fetched and merged in order"""
+        repos_url = ORGPAYLOAD["repos_url"]
+        pages = {
+            None: REPOSPAYLOAD[:3],
+            "2": REPOSPAYLOAD[3:6],
+            "3": REPOSPAYLOAD[6:],
+        }
+
+        def get(url, params=None):
+            """serve the org, then a page of the repos listing"""
+            if url == "https://api.github.com/orgs/google":
+                return Mock(json=lambda: ORGPAYLOAD)
+            page = url.split("&page=")[1] if "&page=" in url else None
+            return Mock(json=lambda: pages[page], links={
+                "last": {"url": repos_url + "?per_page=3&page=3"}})
+
+        mock_get.side_effect = get
+        cli = AsyncGithubOrgClient("google", max_concurrency=2)
+        self.assertEqual(await cli.public_repos(), EXPECTED_REPOS)
+        self.assertEqual(await cli.public_repos("apache-2.0"),
+                         APACHE2_REPOS)
+        self.assertEqual(mock_get.call_count, 4)
+
+    @patch('utils.requests.get')
+    async def test_concurrent_awaits(self, mock_get: MagicMock):
+        """tests that concurrent awaits share a single fetch"""
+        mock_get.side_effect = [
+            Mock(json=lambda: ORGPAYLOAD),
+            Mock(json=lambda: REPOSPAYLOAD, links={}),
+        ]
+        cli = AsyncGithubOrgClient("google")
+        results = await asyncio.gather(
+            *(cli.public_repos() for _ in range(5)))
+        self.assertEqual(results, [EXPECTED_REPOS] * 5)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('utils.requests.get')
+    async def test_coalesced_clients(self, mock_get: MagicMock):
+        """tests that clients of the same org share in-flight requests"""
+        def get(url, params=None):
+            """slow responses"""
+            time.sleep(0.05)
+            if url == "https://api.github.com/orgs/google":
+                return Mock(json=lambda: ORGPAYLOAD)
+            return Mock(json=lambda: REPOSPAYLOAD, links={})
+
+        mock_get.side_effect = get
+        results = await asyncio.gather(*(
+            AsyncGithubOrgClient("google").public_repos() for _ in range(5)))
+        self.assertEqual(results, [EXPECTED_REPOS] * 5)
+        self.assertEqual(mock_get.call_count, 2)
+
+
+class TestGithubOrgBatch(unittest.IsolatedAsyncioTestCase):
+    """
+    TestGithubOrgBatch
+    """
+
+    @patch('utils.requests.get')
+    async def test_batch(self, mock_get: MagicMock):
+        """tests per-org isolation and the global concurrency limit"""
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def get(url, params=None):
+            """serve every org but "broken", counting requests in flight"""
+            with lock:
+                in_flight.append(url)
+                peak.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.remove(url)
+            if url.endswith("/broken"):
+                raise ConnectionError("broken")
+            if "/orgs/" in url and not url.endswith("/repos"):
+                return Mock(json=lambda: {"repos_url": url + "/repos"})
+            return Mock(json=lambda: REPOSPAYLOAD, links={})
+
+        mock_get.side_effect = get
+        org_names = ["org{}".format(i) for i in range(10)] + ["broken"]
+        results = [result async for result in GithubOrgBatch(
+            org_names, max_concurrency=3, license="apache-2.0")]
+        self.assertEqual(sorted(r.org_name for r in results),
+                         sorted(org_names))
+        for result in results:
+            if result.org_name == "broken":
+                self.assertIsInstance(result.error, ConnectionError)
+            else:
+                self.assertEqual(result.repos, APACHE2_REPOS)
+        self.assertLessEqual(max(peak), 3)
+
+    @patch('utils.requests.get')
+    async def test_batch_threads(self, mock_get: MagicMock):
+        """tests that max_concurrency is not capped by the default
+        executor"""
+        barrier = threading.Barrier(40, timeout=5)
+
+        def get(url, params=None):
+            """hold every org request until all of them are in flight"""
+            if not url.endswith("/repos"):
+                barrier.wait()
+                return Mock(json=lambda: {"repos_url": url + "/repos"})
+            return Mock(json=lambda: REPOSPAYLOAD, links={})
+
+        mock_get.side_effect = get
+        results = [result async for result in GithubOrgBatch(
+            ["org{}".format(i) for i in range(40)], max_concurrency=40)]
+        self.assertEqual([result.error for result in results], [None] * 40)
+
 
 def requests_get(*args, **kwargs):
     """
@@ -115,6 +392,7 @@ def requests_get(*args, **kwargs):
 
         def __init__(self, json_data):
             self.json_data = json_data
+            self.links = {}
 
         def json(self):
             return self.json_data
@@ -149,10 +427,10 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
         """
         cls.get_patcher.stop()
 
-    @patch("client.get_json")
-    def test_public_repos(self, mock_get_json: MagicMock):
+    @patch("client.get_json_pages")
+    def test_public_repos(self, mock_get_json_pages: MagicMock):
         """test the public_repos() method with mocking"""
-        mock_get_json.return_value = GREPOS
+        mock_get_json_pages.return_value = [GREPOS]
         with patch.object(
             GithubOrgClient, "_public_repos_url", new_callable=PropertyMock
         ) as cm:
@@ -162,7 +440,7 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
             expected = ["example-repo", "example-repo2"]
             for rname in response:
                 self.assertIn(rname, expected)
-            mock_get_json.assert_called_once()
+            mock_get_json_pages.assert_called_once()
             cm.assert_called_once()
 
     def test_public_repos_with_license(self):
@@ -171,8 +449,8 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
         """
         client = GithubOrgClient("google")
         self.mock_requests_get.side_effect = [
-            Mock(json=lambda: self.org_payload),
-            Mock(json=lambda: self.repos_payload)
+            Mock(json=lambda: self.org_payload, links={}),
+            Mock(json=lambda: self.repos_payload, links={})
         ]
         result = client.public_repos(license="apache-2.0")
         self.assertEqual(result, self.apache2_repos)
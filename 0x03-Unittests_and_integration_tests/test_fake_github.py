@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Topic: Unittests and Integration Tests
+Author: Khotso Selading
+Date: 01-02-2024
+"""
+
+import requests
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from client import GithubOrgClient
+from fake_github import FakeGithub, fixture_repos
+from fixtures import TEST_PAYLOAD
+from ratelimit import is_rate_limited
+from retry import RetryPolicy
+from utils import Transport, ValidatorCache, get_json
+
+EXPECTED_REPOS = TEST_PAYLOAD[0][2]
+APACHE2_REPOS = TEST_PAYLOAD[0][3]
+
+
+class TestFakeGithub(unittest.TestCase):
+    """
+    TestFakeGithub
+    """
+
+    def setUp(self):
+        """
+        start a fresh server for each test
+        """
+        self.server = FakeGithub().start()
+        self.addCleanup(self.server.stop)
+
+        class Client(GithubOrgClient):
+            ORG_URL = self.server.org_url
+        self.Client = Client
+
+    def test_public_repos(self):
+        """
+        test the client end to end against the fixture org
+        """
+        client = self.Client("google")
+        self.assertEqual(client.public_repos(), EXPECTED_REPOS)
+        self.assertEqual(client.public_repos("apache-2.0"), APACHE2_REPOS)
+
+    def test_pagination(self):
+        """
+        test that pages are followed through the Link headers
+        """
+        self.server.orgs["google"] = fixture_repos(30)
+        with Transport() as transport:
+            client = self.Client("google", transport)
+            names = list(client.iter_public_repos())
+        self.assertEqual(len(names), 30 * len(TEST_PAYLOAD[0][1]))
+        self.assertEqual(len(set(names)), len(names))
+        self.assertEqual(self.server.requests["/orgs/google/repos"], 3)
+
+    def test_etag(self):
+        """
+        test that conditional requests are answered with 304 for free
+        """
+        url = self.server.url + "/orgs/google"
+        first = requests.get(url)
+        second = requests.get(url, headers={"If-None-Match":
+                                            first.headers["ETag"]})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.headers["X-RateLimit-Remaining"],
+                         first.headers["X-RateLimit-Remaining"])
+        with Transport(validators=ValidatorCache()) as transport:
+            self.assertEqual(get_json(url, transport), first.json())
+            self.assertEqual(get_json(url, transport), first.json())
+
+    def test_rate_limit(self):
+        """
+        test that requests beyond the limit are refused with a 403
+        """
+        self.server.rate_limit = 2
+        url = self.server.url + "/orgs/google"
+        responses = [requests.get(url) for _ in range(3)]
+        self.assertEqual([response.status_code for response in responses],
+                         [200, 200, 403])
+        self.assertEqual(responses[1].headers["X-RateLimit-Remaining"], "0")
+        self.assertTrue(is_rate_limited(responses[2]))
+        other = requests.get(url, headers={"Authorization": "token other"})
+        self.assertEqual(other.status_code, 200)
+
+    def test_errors(self):
+        """
+        test that injected errors are served and retried
+        """
+        self.server.fail_next(502, 503)
+        retry = RetryPolicy(backoff=0)
+        with Transport(retry=retry) as transport:
+            client = self.Client("google", transport)
+            self.assertEqual(client.org["login"], "google")
+        self.assertEqual(self.server.requests["/orgs/google"], 3)
+        self.server.error_rate = 1.0
+        self.assertEqual(requests.get(self.server.url).status_code, 502)
+
+    def test_concurrency(self):
+        """
+        test that concurrent requests wait on the latency together
+        """
+        self.server.latency = 0.2
+        url = self.server.url + "/orgs/google"
+        with Transport(pool_maxsize=200) as transport, \
+                ThreadPoolExecutor(200) as pool:
+            payloads = list(pool.map(
+                lambda n: get_json("{}?n={}".format(url, n), transport),
+                range(400)))
+        self.assertEqual(len(payloads), 400)
+        self.assertEqual(self.server.requests["/orgs/google"], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Topic: Unittests and Integration Tests
+Author: Khotso Selading
+Date: 01-02-2024
+"""
+
+import metrics
+import unittest
+from client import ORG_CACHE, GithubOrgClient
+from fake_github import FakeGithub
+from metrics import Histogram, Metrics
+from parameterized import parameterized
+from retry import RetryPolicy
+from utils import Transport, ValidatorCache, get_json
+
+
+class TestHistogram(unittest.TestCase):
+    """
+    TestHistogram
+    """
+
+    @parameterized.expand([
+        ([0.5, 1.0, 3.0], [(1.0, 2), (2.0, 2), (float("inf"), 3)]),
+        ([], [(1.0, 0), (2.0, 0), (float("inf"), 0)]),
+    ])
+    def test_buckets(self, values, expected):
+        """
+        test that buckets are cumulative and include their bound
+        """
+        histogram = Histogram((1.0, 2.0))
+        for value in values:
+            histogram.observe(value)
+        self.assertEqual(histogram.buckets(), expected)
+        self.assertEqual(histogram.count, len(values))
+        self.assertEqual(histogram.sum, sum(values))
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    TestMetrics
+    """
+
+    def setUp(self):
+        """
+        start a fake server and an active registry collecting events
+        """
+        self.server = FakeGithub().start()
+        self.addCleanup(self.server.stop)
+        self.url = self.server.url + "/orgs/google"
+        self.host = self.url.split("/")[2]
+        self.events = []
+        self.registry = metrics.enable(Metrics(callbacks=[
+            self.events.append]))
+        self.addCleanup(metrics.disable)
+
+    def test_requests(self):
+        """
+        test that status, latency, bytes and headroom are recorded
+        """
+        with Transport(validators=ValidatorCache()) as transport:
+            get_json(self.url, transport)
+            get_json(self.url, transport)
+        snapshot = self.registry.snapshot()
+        labels = "host={}".format(self.host)
+        self.assertEqual(snapshot["github_requests_total"], {
+            labels + ",status=200": 1, labels + ",status=304": 1})
+        self.assertEqual(snapshot["github_cache_lookups_total"], {
+            "cache=inflight,result=miss": 2,
+            "cache=validators,result=hit": 1,
+            "cache=validators,result=miss": 1})
+        self.assertEqual(
+            snapshot["github_request_duration_seconds"][labels]["count"], 2)
+        self.assertGreater(
+            snapshot["github_response_bytes_total"][labels], 0)
+        self.assertEqual(snapshot["github_ratelimit_remaining"][labels],
+                         4999)
+        self.assertEqual(
+            [event["status"] for event in self.events
+             if event["event"] == "request"], [200, 304])
+
+    def test_retries(self):
+        """
+        test that retried failures are counted
+        """
+        self.server.fail_next(502)
+        with Transport(retry=RetryPolicy(backoff=0)) as transport:
+            get_json(self.url, transport)
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot["github_request_retries_total"], {
+            "host={},reason=failure".format(self.host): 1})
+
+    def test_memoize(self):
+        """
+        test that memoize lookups are counted as hits and misses
+        """
+        class Client(GithubOrgClient):
+            ORG_URL = self.server.org_url
+        client = Client("google")
+        client.org
+        client.org
+        self.assertEqual(
+            self.registry.snapshot()["github_cache_lookups_total"], {
+                "cache=inflight,result=miss": 1,
+                "cache=memoize:GithubOrgClient.org,result=hit": 1,
+                "cache=memoize:GithubOrgClient.org,result=miss": 1})
+
+    def test_prometheus(self):
+        """
+        test the text exposition of counters, histograms and caches
+        """
+        self.registry.track("org", ORG_CACHE)
+        get_json(self.url)
+        text = self.registry.prometheus()
+        self.assertIn("# TYPE github_requests_total counter\n", text)
+        self.assertIn('github_requests_total{{host="{}",status="200"}} 1\n'
+                      .format(self.host), text)
+        self.assertIn("# TYPE github_request_duration_seconds histogram\n",
+                      text)
+        self.assertIn('github_request_duration_seconds_bucket{{host="{}",'
+                      'le="+Inf"}} 1\n'.format(self.host), text)
+        self.assertIn('github_memo_cache_size{cache="org"}', text)
+
+    def test_disabled(self):
+        """
+        test that nothing is recorded once disabled
+        """
+        metrics.disable()
+        get_json(self.url)
+        self.assertEqual(self.registry.snapshot(), {})
+        self.assertEqual(self.events, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
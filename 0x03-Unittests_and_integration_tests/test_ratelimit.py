@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Topic: Unittests and Integration Tests
+Author: Khotso Selading
+Date: 01-02-2024
+"""
+
+import time
+import unittest
+from parameterized import parameterized
+from unittest.mock import Mock, patch
+from ratelimit import RateLimiter, is_rate_limited
+from typing import Dict
+from utils import Transport, get_json
+
+
+def response(status_code: int = 200, headers: Dict = None,
+             text: str = "") -> Mock:
+    """
+    Build a mock response
+    """
+    return Mock(status_code=status_code, headers=headers or {}, text=text,
+                json=lambda: {"payload": True}, links={})
+
+
+class TestIsRateLimited(unittest.TestCase):
+    """
+    TestIsRateLimited
+    """
+
+    @parameterized.expand([
+        (200, {}, "", False),
+        (429, {}, "", True),
+        (403, {}, "Forbidden", False),
+        (403, {"Retry-After": "5"}, "", True),
+        (403, {"X-RateLimit-Remaining": "0"}, "", True),
+        (403, {}, "You have exceeded a secondary rate limit", True),
+    ])
+    def test_is_rate_limited(self, status_code: int, headers: Dict,
+                             text: str, expected: bool):
+        """
+        test primary and secondary rate limit detection
+        """
+        self.assertEqual(
+            is_rate_limited(response(status_code, headers, text)), expected)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """
+    TestRateLimiter
+    """
+
+    def test_burst_then_pace(self):
+        """
+        test that requests beyond the burst wait for the refill rate
+        """
+        limiter = RateLimiter(rate=10, burst=2)
+        delays = [limiter.reserve() for _ in range(4)]
+        self.assertEqual(delays[:2], [0.0, 0.0])
+        self.assertAlmostEqual(delays[2], 0.1, places=2)
+        self.assertAlmostEqual(delays[3], 0.2, places=2)
+
+    def test_tokens_are_separate(self):
+        """
+        test that each token has its own bucket
+        """
+        limiter = RateLimiter(rate=10, burst=1)
+        self.assertEqual(limiter.reserve("a"), 0.0)
+        self.assertEqual(limiter.reserve("b"), 0.0)
+        self.assertGreater(limiter.reserve("a"), 0.0)
+
+    def test_update(self):
+        """
+        test that the headers spread the remaining quota until the reset
+        """
+        limiter = RateLimiter(rate=1000, burst=1)
+        limiter.update(response(headers={
+            "X-RateLimit-Remaining": "100",
+            "X-RateLimit-Reset": str(time.time() + 100),
+        }))
+        limiter.reserve()
+        self.assertAlmostEqual(limiter.reserve(), 1.0, places=1)
+
+    def test_retry_after(self):
+        """
+        test that Retry-After blocks every request with the token
+        """
+        limiter = RateLimiter()
+        delay = limiter.retry_delay(response(429, {"Retry-After": "30"}), 0)
+        self.assertEqual(delay, 30.0)
+        self.assertAlmostEqual(limiter.reserve(), 30.0, places=1)
+
+    def test_backoff_jitter(self):
+        """
+        test that the backoff stays within its exponential bound
+        """
+        limiter = RateLimiter(backoff=1.0, max_backoff=5.0)
+        for attempt in range(6):
+            delay = limiter.retry_delay(response(403, text="rate limit"),
+                                        attempt, str(attempt))
+            self.assertLessEqual(delay, min(5.0, 2 ** attempt))
+
+    def test_transport_retry(self):
+        """
+        test that a transport retries a rate limited request
+        """
+        transport = Transport(limiter=RateLimiter(backoff=0.001))
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.side_effect = [response(429), response()]
+            self.assertEqual(get_json("http://example.com", transport),
+                             {"payload": True})
+            self.assertEqual(mock_get.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
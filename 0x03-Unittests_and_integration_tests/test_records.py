@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Topic: Unittests and Integration Tests
+Author: Khotso Selading
+Date: 01-02-2024
+"""
+
+import unittest
+from fixtures import TEST_PAYLOAD
+from records import DEFAULT_FIELDS, Repo, record_type
+
+REPOSPAYLOAD = TEST_PAYLOAD[0][1]
+
+
+class TestRecordType(unittest.TestCase):
+    """
+    TestRecordType
+    """
+
+    def test_from_json(self):
+        """
+        test that only the configured fields are kept
+        """
+        repo = Repo.from_json(REPOSPAYLOAD[0])
+        self.assertEqual(repo.to_dict(), {
+            "name": "episodes.dart",
+            "license_key": "bsd-3-clause",
+            "owner_login": "google",
+            "updated_at": REPOSPAYLOAD[0]["updated_at"],
+        })
+        self.assertFalse(hasattr(repo, "__dict__"))
+
+    def test_missing_fields(self):
+        """
+        test that missing fields are None and name/license are always kept
+        """
+        Stars = record_type(("stargazers_count",))
+        self.assertEqual(Stars.__slots__,
+                         ("name", "license_key", "stargazers_count"))
+        self.assertEqual(Stars.from_json({"name": "a", "license": None}),
+                         Stars.from_json({"name": "a"}))
+
+    def test_cached_type(self):
+        """
+        test that the same fields build the same type
+        """
+        self.assertIs(record_type(), record_type(DEFAULT_FIELDS))
+        self.assertIs(record_type(["name"]), record_type(("license.key",)))
+
+    def test_interned(self):
+        """
+        test that repeated strings are shared between records
+        """
+        first, second = (Repo.from_json(repo) for repo in REPOSPAYLOAD[:2])
+        self.assertIs(first.owner_login, second.owner_login)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Topic: Unittests and Integration Tests
+Author: Khotso Selading
+Date: 01-02-2024
+"""
+
+import requests
+import unittest
+from parameterized import parameterized
+from unittest.mock import Mock, patch
+from client import GithubOrgClient
+from fake_github import FakeGithub
+from retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from utils import Transport, get_json
+
+
+def response(status_code: int = 200) -> Mock:
+    """
+    Build a mock response
+    """
+    return Mock(status_code=status_code, headers={},
+                json=lambda: {"payload": True}, links={})
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """
+    TestRetryPolicy
+    """
+
+    @parameterized.expand([
+        ("GET", 0, True),
+        ("get", 2, True),
+        ("GET", 3, False),
+        ("POST", 0, False),
+        ("PATCH", 0, False),
+    ])
+    def test_should_retry(self, method: str, attempt: int, expected: bool):
+        """
+        test that only idempotent methods are retried, a bounded number
+        of times
+        """
+        self.assertEqual(RetryPolicy(max_retries=3).should_retry(
+            method, attempt), expected)
+
+    @parameterized.expand([
+        (response(502), None, True),
+        (response(404), None, False),
+        (None, requests.ConnectionError(), True),
+        (None, requests.Timeout(), True),
+        (None, ValueError(), False),
+    ])
+    def test_is_failure(self, resp, error, expected: bool):
+        """
+        test which outcomes are transient failures
+        """
+        self.assertEqual(RetryPolicy().is_failure(resp, error), expected)
+
+    def test_delay(self):
+        """
+        test that the backoff is bounded
+        """
+        policy = RetryPolicy(backoff=1.0, max_backoff=4.0)
+        for attempt in range(6):
+            self.assertLessEqual(policy.delay(attempt),
+                                 min(4.0, 2 ** attempt))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """
+    TestCircuitBreaker
+    """
+
+    def test_open_and_reset(self):
+        """
+        test that the circuit opens at the threshold and lets one trial
+        through after the timeout
+        """
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        with patch("retry.time.monotonic", return_value=100):
+            breaker.record_failure("a.com")
+            breaker.before_request("a.com")
+            breaker.record_failure("a.com")
+            self.assertEqual(breaker.state("a.com"), "open")
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_request("a.com")
+            breaker.before_request("b.com")
+        with patch("retry.time.monotonic", return_value=111):
+            self.assertEqual(breaker.state("a.com"), "half-open")
+            breaker.before_request("a.com")
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_request("a.com")
+            breaker.record_success("a.com")
+            self.assertEqual(breaker.state("a.com"), "closed")
+
+    def test_failed_trial(self):
+        """
+        test that a failed trial opens the circuit again
+        """
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        with patch("retry.time.monotonic", return_value=100):
+            breaker.record_failure("a.com")
+        with patch("retry.time.monotonic", return_value=111):
+            breaker.before_request("a.com")
+            breaker.record_failure("a.com")
+            self.assertEqual(breaker.state("a.com"), "open")
+
+
+class TestTransportRetry(unittest.TestCase):
+    """
+    TestTransportRetry
+    """
+
+    def test_retry(self):
+        """
+        test that transient failures are retried
+        """
+        transport = Transport(retry=RetryPolicy(backoff=0.001))
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.side_effect = [
+                requests.ConnectionError(), response(502), response()]
+            self.assertEqual(get_json("http://example.com", transport),
+                             {"payload": True})
+            self.assertEqual(mock_get.call_count, 3)
+
+    def test_give_up(self):
+        """
+        test that the last error is raised once retries are exhausted
+        """
+        transport = Transport(retry=RetryPolicy(max_retries=1,
+                                                backoff=0.001))
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.side_effect = requests.ConnectionError()
+            with self.assertRaises(requests.ConnectionError):
+                get_json("http://example.com", transport)
+            self.assertEqual(mock_get.call_count, 2)
+
+    def test_give_up_status(self):
+        """
+        test that a status still failing after the last attempt raises
+        """
+        transport = Transport(retry=RetryPolicy(max_retries=1,
+                                                backoff=0.001))
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.side_effect = [response(502), response(503)]
+            with self.assertRaises(requests.HTTPError) as cm:
+                get_json("http://example.com", transport)
+            self.assertEqual(cm.exception.response.status_code, 503)
+            self.assertEqual(mock_get.call_count, 2)
+
+    def test_not_memoized(self):
+        """
+        test that an org which kept failing is fetched again later
+        """
+        with FakeGithub() as server:
+            class Client(GithubOrgClient):
+                ORG_URL = server.org_url
+            transport = Transport(retry=RetryPolicy(max_retries=1,
+                                                    backoff=0.001))
+            client = Client("google", transport)
+            server.fail_next(502, 502)
+            with self.assertRaises(requests.HTTPError):
+                client.public_repos()
+            self.assertEqual(client.org["login"], "google")
+            transport.close()
+
+    def test_timeout(self):
+        """
+        test that requests are sent with the timeout and retried on it
+        """
+        transport = Transport(retry=RetryPolicy(backoff=0.001), timeout=2)
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.side_effect = [requests.Timeout(), response()]
+            self.assertEqual(get_json("http://example.com", transport),
+                             {"payload": True})
+            mock_get.assert_called_with("http://example.com", params=None,
+                                        timeout=2)
+
+    def test_fail_fast(self):
+        """
+        test that an open circuit stops requests to the host
+        """
+        transport = Transport(breaker=CircuitBreaker(failure_threshold=1))
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.side_effect = requests.ConnectionError()
+            with self.assertRaises(requests.ConnectionError):
+                get_json("http://example.com/a", transport)
+            with self.assertRaises(CircuitOpenError):
+                get_json("http://example.com/b", transport)
+            mock_get.assert_called_once()
+
+    def test_trial_other_error(self):
+        """
+        test that an error saying nothing about the host neither closes
+        the circuit nor blocks the next trial
+        """
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        transport = Transport(breaker=breaker)
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.side_effect = [requests.ConnectionError(),
+                                    ValueError(), response()]
+            with self.assertRaises(requests.ConnectionError):
+                get_json("http://example.com/a", transport)
+            with self.assertRaises(ValueError):
+                get_json("http://example.com/b", transport)
+            self.assertEqual(breaker.state("example.com"), "half-open")
+            get_json("http://example.com/c", transport)
+            self.assertEqual(breaker.state("example.com"), "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Topic: Unittests and Integration Tests
+Author: Khotso Selading
+Date: 01-02-2024
+"""
+
+import json
+import unittest
+from parameterized import parameterized
+from unittest.mock import MagicMock, patch
+from fixtures import TEST_PAYLOAD
+from streaming import ijson, iter_json_array
+from utils import get_json_stream
+
+REPOSPAYLOAD = TEST_PAYLOAD[0][1]
+BODY = json.dumps(REPOSPAYLOAD, ensure_ascii=False).encode()
+FIELDS = [("name",), ("license", "key")]
+BACKENDS = [("python",), ("ijson",)]
+
+
+def chunked(data: bytes, size: int):
+    """
+    Split data into chunks of size bytes
+    """
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def projected(repo):
+    """
+    Expected projection of a fixture repo
+    """
+    record = {"name": repo["name"]}
+    if repo.get("license"):
+        record["license"] = {"key": repo["license"]["key"]}
+    return record
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """
+    TestIterJsonArray
+    """
+
+    def setUp(self):
+        """
+        skip the ijson backend when it is not installed
+        """
+        if "ijson" in self.id() and ijson is None:
+            self.skipTest("ijson is not installed")
+
+    @parameterized.expand(BACKENDS)
+    def test_full_records(self, backend: str):
+        """
+        test that unprojected records match json.loads
+        """
+        records = list(iter_json_array(chunked(BODY, 1000), None, backend))
+        self.assertEqual(records, REPOSPAYLOAD)
+
+    @parameterized.expand(BACKENDS)
+    def test_projection(self, backend: str):
+        """
+        test that only the requested fields are kept, across any chunking
+        """
+        expected = [projected(repo) for repo in REPOSPAYLOAD]
+        for size in (1, 7, 4096, len(BODY)):
+            records = list(iter_json_array(chunked(BODY, size), FIELDS,
+                                           backend))
+            self.assertEqual(records, expected)
+
+    @parameterized.expand(BACKENDS)
+    def test_empty_array(self, backend: str):
+        """
+        test that an empty array yields nothing
+        """
+        self.assertEqual(list(iter_json_array([b" [ ] "], None, backend)),
+                         [])
+
+    def test_multibyte_split(self):
+        """
+        test that a character split across chunks is decoded
+        """
+        body = '[{"name": "❤️"}]'.encode()
+        self.assertEqual(
+            list(iter_json_array(chunked(body, 1), FIELDS, "python")),
+            [{"name": "❤️"}])
+
+    @parameterized.expand([
+        (b'{"name": "a"}',),
+        (b'[{"name": "a"}, {"name"',),
+    ])
+    def test_invalid(self, body: bytes):
+        """
+        test that non arrays and truncated arrays raise ValueError
+        """
+        with self.assertRaises(ValueError):
+            list(iter_json_array([body], FIELDS, "python"))
+
+
+class TestGetJsonStream(unittest.TestCase):
+    """
+    TestGetJsonStream
+    """
+
+    @patch('utils.requests.get')
+    def test_get_json_stream(self, mock_get: MagicMock):
+        """
+        test that pages are streamed through the next links
+        """
+        next_url = "http://example.com?page=2"
+        first, second = MagicMock(), MagicMock()
+        first.iter_content.return_value = chunked(
+            json.dumps(REPOSPAYLOAD[:4]).encode(), 100)
+        first.links = {"next": {"url": next_url}}
+        second.iter_content.return_value = [
+            json.dumps(REPOSPAYLOAD[4:]).encode()]
+        second.links = {}
+        mock_get.side_effect = [first, second]
+        records = list(get_json_stream("http://example.com", FIELDS))
+        self.assertEqual(records, [projected(repo) for repo in REPOSPAYLOAD])
+        mock_get.assert_called_with(next_url, params=None, stream=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,10 +5,19 @@ Author: Khotso Selading
 Date: 01-02-2024
 """
 
+import asyncio
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from parameterized import parameterized
 from unittest.mock import MagicMock, Mock, patch
-from utils import access_nested_map, memoize, get_json
+from utils import (
+    INFLIGHT, MemoCache, Transport, ValidatorCache, access_nested_map,
+    compile_path, get_json, get_json_page, get_json_pages, memoize,
+    page_urls, shared_memoize, shared_transport
+)
 from typing import Dict, Sequence, Union
 
 
@@ -42,6 +51,47 @@ class TestAccessNestedMap(unittest.TestCase):
         self.assertEqual(str(context.exception).strip("'"), expected_message)
 
 
+class TestCompilePath(unittest.TestCase):
+    """
+    TestCompilePath
+    """
+
+    @parameterized.expand([
+        ({"a": 1}, ("a",), 1),
+        ({"a": {"b": 2}}, ("a",), {"b": 2}),
+        ({"a": {"b": 2}}, ("a", "b"), 2),
+        ({"a": MappingProxyType({"b": 2})}, ("a", "b"), 2),
+    ])
+    def test_compile_path(self, nested_map: Dict, path: Sequence,
+                          expected_result: Union[Dict, int]):
+        """
+        test that the getter matches access_nested_map
+        """
+        self.assertEqual(compile_path(path)(nested_map), expected_result)
+
+    @parameterized.expand([
+        ({}, ("a",), "a"),
+        ({"a": 1}, ("a", "b"), "b"),
+        ({"a": [0]}, ("a", 0), "0"),
+    ])
+    def test_compile_path_exception(self, nested_map: Dict, path: Sequence,
+                                    expected_message: str):
+        """
+        test that missing keys raise KeyError without a default
+        """
+        with self.assertRaises(KeyError) as context:
+            compile_path(path)(nested_map)
+        self.assertEqual(str(context.exception).strip("'"), expected_message)
+
+    def test_many(self):
+        """
+        test batch extraction with a default
+        """
+        getter = compile_path(("license", "key"), default=None)
+        records = [{"license": {"key": "mit"}}, {"license": None}, {}]
+        self.assertEqual(getter.many(records), ["mit", None, None])
+
+
 class TestGetJson(unittest.TestCase):
     """
     test_org
@@ -63,6 +113,252 @@ class TestGetJson(unittest.TestCase):
         self.assertEqual(result, test_payload)
 
 
+class TestCoalescer(unittest.TestCase):
+    """
+    TestCoalescer
+    """
+
+    @patch('utils.requests.get')
+    def test_get_json_threads(self, mock_get: MagicMock):
+        """
+        test that concurrent calls share one request and one result
+        """
+        def get(url):
+            """slow response"""
+            time.sleep(0.05)
+            return Mock(json=lambda: {"url": url})
+
+        mock_get.side_effect = get
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: get_json("http://a.org"),
+                                    range(8)))
+            other = pool.submit(get_json, "http://b.org").result()
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(other, {"url": "http://b.org"})
+        self.assertEqual(get_json("http://a.org"), results[0])
+        self.assertEqual(mock_get.call_count, 3)
+
+    def test_errors(self):
+        """
+        test that the leader's exception is raised in every waiter
+        """
+        def fail():
+            """slow failure"""
+            time.sleep(0.05)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(INFLIGHT.run, "key", fail)
+                       for _ in range(4)]
+        for future in futures:
+            self.assertIsInstance(future.exception(), ValueError)
+
+    @patch('utils.requests.get')
+    def test_get_json_page_threads(self, mock_get: MagicMock):
+        """
+        test that overlapping get_json and get_json_page calls for the
+        same URL each get their own shape
+        """
+        def get(url, params=None):
+            """slow response"""
+            time.sleep(0.05)
+            return Mock(json=lambda: {"url": url}, links={})
+
+        mock_get.side_effect = get
+        with ThreadPoolExecutor(2) as pool:
+            payload = pool.submit(get_json, "http://a.org")
+            page = pool.submit(get_json_page, "http://a.org")
+            self.assertEqual(payload.result(), {"url": "http://a.org"})
+            self.assertEqual(page.result(), ({"url": "http://a.org"}, {}))
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_key(self):
+        """
+        test that requests with other credentials, through other
+        transports or by other operations are not shared
+        """
+        alice = Transport(headers={"Authorization": "token a"})
+        bob = Transport(headers={"Authorization": "token b"})
+        carol = Transport(headers={"Authorization": "token a"})
+        self.assertNotEqual(INFLIGHT.key("http://a.org", None, alice),
+                            INFLIGHT.key("http://a.org", None, bob))
+        self.assertNotEqual(INFLIGHT.key("http://a.org", None, alice),
+                            INFLIGHT.key("http://a.org", None, carol))
+        self.assertNotEqual(INFLIGHT.key("http://a.org", op="json"),
+                            INFLIGHT.key("http://a.org"))
+        self.assertEqual(INFLIGHT.key("http://a.org", {"a": 1, "b": 2}),
+                         INFLIGHT.key("http://a.org", {"b": 2, "a": 1}))
+
+
+class TestCoalescerAsync(unittest.IsolatedAsyncioTestCase):
+    """
+    TestCoalescerAsync
+    """
+
+    async def test_run_async(self):
+        """
+        test that concurrent awaits share one coroutine
+        """
+        calls = []
+
+        async def fetch():
+            """slow fetch"""
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"payload": True}
+
+        results = await asyncio.gather(
+            *(INFLIGHT.run_async("key", fetch) for _ in range(5)))
+        self.assertEqual(results, [{"payload": True}] * 5)
+        self.assertEqual(len(calls), 1)
+        await INFLIGHT.run_async("key", fetch)
+        self.assertEqual(len(calls), 2)
+
+
+class TestTransport(unittest.TestCase):
+    """
+    TestTransport
+    """
+
+    def test_pool_size(self):
+        """
+        test that the adapters pool the configured number of connections
+        """
+        with Transport(pool_maxsize=32) as transport:
+            adapter = transport.session.get_adapter("https://example.com")
+            self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertTrue(transport.closed)
+
+    def test_get_json(self):
+        """
+        test that get_json goes through the transport session
+        """
+        transport = Transport()
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.return_value.json.return_value = {"payload": True}
+            self.assertEqual(get_json("http://example.com", transport),
+                             {"payload": True})
+            mock_get.assert_called_once_with("http://example.com",
+                                             params=None)
+
+    def test_conditional_get_json(self):
+        """
+        test that a 304 is answered with the cached payload
+        """
+        transport = Transport(validators=ValidatorCache())
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.side_effect = [
+                Mock(status_code=200, headers={"ETag": '"v1"'},
+                     json=lambda: {"payload": True}, links={}),
+                Mock(status_code=304, headers={"ETag": '"v1"'}),
+            ]
+            first = get_json("http://example.com", transport)
+            second = get_json("http://example.com", transport)
+            self.assertEqual(first, {"payload": True})
+            self.assertIs(second, first)
+            mock_get.assert_called_with("http://example.com", params=None,
+                                        headers={"If-None-Match": '"v1"'})
+
+    def test_conditional_get_json_evicted(self):
+        """
+        test that a 304 is answered even if the entry was evicted while
+        the conditional request was in flight
+        """
+        validators = ValidatorCache(maxsize=1)
+        transport = Transport(validators=validators)
+        with patch.object(transport.session, "get") as mock_get:
+            mock_get.return_value = Mock(
+                status_code=200, headers={"ETag": '"a"'},
+                json=lambda: {"a": True}, links={})
+            get_json("http://a.com", transport)
+
+            def evict(url, **kwargs):
+                """store another URL before answering 304"""
+                validators.store(validators.key("http://b.com"),
+                                 Mock(headers={"ETag": '"b"'}, links={}),
+                                 {"b": True})
+                return Mock(status_code=304, headers={"ETag": '"a"'})
+            mock_get.side_effect = evict
+            self.assertEqual(get_json("http://a.com", transport),
+                             {"a": True})
+            self.assertEqual(validators.headers(validators.key(
+                "http://a.com")), {})
+
+    def test_validator_cache_eviction(self):
+        """
+        test that the least recently used entry is evicted
+        """
+        cache = ValidatorCache(maxsize=1)
+        response = Mock(headers={"Last-Modified": "yesterday"}, links={})
+        cache.store(cache.key("http://a.com"), response, 1)
+        cache.store(cache.key("http://b.com"), response, 2)
+        self.assertEqual(cache.headers(cache.key("http://a.com")), {})
+        self.assertEqual(cache.headers(cache.key("http://b.com")),
+                         {"If-Modified-Since": "yesterday"})
+
+    def test_shared_transport(self):
+        """
+        test that the shared transport is reused until closed
+        """
+        transport = shared_transport()
+        self.assertIs(shared_transport(), transport)
+        transport.close()
+        self.assertIsNot(shared_transport(), transport)
+
+
+class TestGetJsonPages(unittest.TestCase):
+    """
+    TestGetJsonPages
+    """
+
+    @patch('utils.requests.get')
+    def test_get_json_pages(self, mock_get: MagicMock):
+        """
+        test that pages are followed through the next links
+        """
+        next_url = "http://example.com?page=2"
+        mock_get.side_effect = [
+            Mock(json=lambda: [1, 2], links={"next": {"url": next_url}}),
+            Mock(json=lambda: [3], links={}),
+        ]
+        pages = get_json_pages("http://example.com", {"per_page": 2})
+        self.assertEqual(list(pages), [[1, 2], [3]])
+        mock_get.assert_any_call("http://example.com",
+                                 params={"per_page": 2})
+        mock_get.assert_called_with(next_url, params=None)
+
+    @patch('utils.requests.get')
+    def test_get_json_pages_is_lazy(self, mock_get: MagicMock):
+        """
+        test that no request is made before the first page is asked for
+        """
+        mock_get.return_value = Mock(json=lambda: [1], links={})
+        pages = get_json_pages("http://example.com")
+        mock_get.assert_not_called()
+        self.assertEqual(next(pages), [1])
+        mock_get.assert_called_once()
+
+
+class TestPageUrls(unittest.TestCase):
+    """
+    TestPageUrls
+    """
+
+    @parameterized.expand([
+        ({}, []),
+        ({"next": {"url": "http://example.com?page=2"}}, []),
+        ({"last": {"url": "http://example.com?per_page=2&page=3"}},
+         ["http://example.com?per_page=2&page=2",
+          "http://example.com?per_page=2&page=3"]),
+    ])
+    def test_page_urls(self, links: Dict, expected: Sequence[str]):
+        """
+        test that page URLs are derived from the last link
+        """
+        self.assertEqual(page_urls(links), expected)
+
+
 class TestMemoize(unittest.TestCase):
     """
     test_org
@@ -97,6 +393,145 @@ class TestMemoize(unittest.TestCase):
         mock_a_method.assert_called_once()
         self.assertEqual(result_1, result_2)
 
+    def test_memoize_threads(self):
+        """
+        test that concurrent readers share a single call
+        """
+        calls = []
+
+        class TestClass:
+            """
+            test_org
+            """
+
+            @memoize
+            def a_property(self):
+                """
+                test_org
+                """
+                calls.append(threading.get_ident())
+                time.sleep(0.05)
+                return 42
+
+        instance = TestClass()
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: instance.a_property, range(8)))
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(len(calls), 1)
+
+
+class TestMemoizeAsync(unittest.IsolatedAsyncioTestCase):
+    """
+    TestMemoizeAsync
+    """
+
+    class TestClass:
+        """
+        test_org
+        """
+
+        def __init__(self):
+            self.calls = 0
+
+        @memoize
+        async def a_property(self):
+            """
+            test_org
+            """
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            if self.calls == 1:
+                raise ValueError("first call fails")
+            return 42
+
+    async def test_memoize_async(self):
+        """
+        test that failures are not cached and values are awaited once
+        """
+        instance = self.TestClass()
+        with self.assertRaises(ValueError):
+            await instance.a_property
+        results = await asyncio.gather(
+            *(instance.a_property for _ in range(5)))
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(await instance.a_property, 42)
+        self.assertEqual(instance.calls, 2)
+
+
+class TestSharedMemoize(unittest.TestCase):
+    """
+    TestSharedMemoize
+    """
+
+    def setUp(self):
+        """
+        build a class memoized in a fresh cache
+        """
+        self.cache = MemoCache(maxsize=2, ttl=60)
+        self.calls = calls = []
+
+        class TestClass:
+            """
+            test_org
+            """
+
+            def __init__(self, name):
+                self.name = name
+
+            @shared_memoize("name", self.cache)
+            def a_property(self):
+                """
+                test_org
+                """
+                calls.append(self.name)
+                return self.name.upper()
+
+        self.TestClass = TestClass
+
+    def test_shared_memoize(self):
+        """
+        test that instances with the same key share one computation
+        """
+        self.assertEqual(self.TestClass("a").a_property, "A")
+        self.assertEqual(self.TestClass("a").a_property, "A")
+        self.assertEqual(self.TestClass("b").a_property, "B")
+        self.assertEqual(self.calls, ["a", "b"])
+        self.assertEqual(self.cache.stats(),
+                         {"hits": 1, "misses": 2, "evictions": 0, "size": 2})
+
+    def test_eviction(self):
+        """
+        test that the least recently used value is evicted
+        """
+        for name in ("a", "b", "a", "c", "a", "b"):
+            self.TestClass(name).a_property
+        self.assertEqual(self.calls, ["a", "b", "c", "b"])
+        self.assertEqual(self.cache.stats()["evictions"], 2)
+
+    def test_threads(self):
+        """
+        test that concurrent readers of one key share a single call
+        """
+        def compute():
+            """slow computation"""
+            time.sleep(0.05)
+            return object()
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(
+                lambda _: self.cache.get_or_set("a", compute), range(8)))
+        self.assertEqual(len(set(map(id, results))), 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_ttl(self):
+        """
+        test that expired values are computed again
+        """
+        self.TestClass("a").a_property
+        with patch("utils.time.monotonic", return_value=1e12):
+            self.TestClass("a").a_property
+        self.assertEqual(self.calls, ["a", "a"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,22 +1,55 @@
 #!/usr/bin/env python3
 """Generic utilities for github org client.
 """
+import asyncio
+import inspect
+import metrics
 import requests
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
+from ratelimit import is_rate_limited
+from retry import CircuitBreaker, RetryPolicy
+from streaming import iter_json_array
+from requests.adapters import HTTPAdapter
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
 from typing import (
     Mapping,
     Sequence,
     Any,
+    Awaitable,
     Dict,
     Callable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
 )
 
 __all__ = [
+    "Coalescer",
+    "CompiledPath",
+    "MemoCache",
+    "Transport",
+    "INFLIGHT",
+    "ValidatorCache",
     "access_nested_map",
+    "compile_path",
     "get_json",
+    "get_json_page",
+    "get_json_pages",
+    "get_json_stream",
+    "page_urls",
+    "post_json",
+    "shared_transport",
     "memoize",
+    "shared_memoize",
 ]
 
+_MISSING = object()
+_DEFAULT_RETRY = RetryPolicy()
+
 
 def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     """Access nested map with key path.
@@ -40,13 +73,543 @@ def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     return nested_map
 
 
-def get_json(url: str) -> Dict:
+class CompiledPath:
+    """Reusable getter for a key path, see ``compile_path``.
+    """
+    __slots__ = ("path", "default")
+
+    def __init__(self, path: Sequence, default: Any) -> None:
+        """Init method of CompiledPath"""
+        self.path = tuple(path)
+        self.default = default
+
+    def __call__(self, nested_map: Mapping) -> Any:
+        """Access nested_map with the compiled path"""
+        default = self.default
+        for key in self.path:
+            if type(nested_map) is not dict and not isinstance(
+                    nested_map, Mapping):
+                if default is _MISSING:
+                    raise KeyError(key)
+                return default
+            if default is _MISSING:
+                nested_map = nested_map[key]
+            else:
+                nested_map = nested_map.get(key, default)
+                if nested_map is default:
+                    return default
+        return nested_map
+
+    def many(self, records: Sequence[Mapping]) -> List[Any]:
+        """Access every record with the compiled path"""
+        return [self(record) for record in records]
+
+
+def compile_path(path: Sequence, default: Any = _MISSING) -> CompiledPath:
+    """Compile a key path into a reusable getter.
+    The returned getter behaves like ``access_nested_map`` with that path,
+    checks plain ``dict`` values without going through the ``Mapping`` ABC
+    and returns ``default`` instead of raising ``KeyError`` when given one.
+    Example
+    -------
+    >>> license_key = compile_path(("license", "key"), default=None)
+    >>> license_key({"license": {"key": "mit"}})
+    'mit'
+    >>> license_key.many([{"license": None}, {"license": {"key": "mit"}}])
+    [None, 'mit']
+    """
+    return CompiledPath(path, default)
+
+
+class ValidatorCache:
+    """HTTP validator cache for conditional requests.
+    Keeps the ``ETag``/``Last-Modified`` validators and the parsed JSON of
+    the last ``maxsize`` URLs fetched, most recently used last. Cached
+    payloads are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """Init method of ValidatorCache"""
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict] = None) -> Tuple:
+        """Cache key of a request"""
+        return url, tuple(sorted((params or {}).items()))
+
+    def headers(self, key: Tuple) -> Dict[str, str]:
+        """Conditional request headers for key"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return self.conditional_headers(entry)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Conditional request headers for an entry, if any"""
+        if entry is None:
+            return {}
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def entry(self, key: Tuple) -> Optional[Dict]:
+        """Cached entry of key, marked as recently used, or None.
+        Entries are replaced, never mutated, so the entry stays valid
+        even if key is evicted or stored again afterwards."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: Tuple) -> Tuple[Any, Dict]:
+        """Cached payload and links of key, marked as recently used"""
+        with self._lock:
+            self._entries.move_to_end(key)
+            entry = self._entries[key]
+        return entry["payload"], entry["links"]
+
+    def store(self, key: Tuple, response: requests.Response,
+              payload: Any) -> None:
+        """Store payload if response carries a validator"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._entries[key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "payload": payload,
+                "links": response.links,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class Transport:
+    """Pooled HTTP transport.
+    Wraps a ``requests.Session`` so that connections are kept alive and
+    reused across calls, with up to ``pool_maxsize`` connections per host.
+    With a ``validators`` cache, requests are made conditional and a
+    ``304 Not Modified`` is answered from the cache. With a ``store``
+    such as ``cache.DiskCache``, fresh responses are served without any
+    request at all. With a ``limiter`` such as ``ratelimit.RateLimiter``,
+    requests are paced per ``Authorization`` header and rate limited ones
+    are retried once the limit allows. A ``retry`` policy retries
+    transient failures with backoff, and a ``breaker`` fails fast with
+    ``retry.CircuitOpenError`` while a host keeps failing; with either, a
+    response still failing after the last attempt raises
+    ``requests.HTTPError``. Requests give up after ``timeout`` seconds
+    without a response, if given.
+    Example
+    -------
+    >>> with Transport(pool_maxsize=32) as transport:
+    ...     get_json("https://api.github.com/orgs/google", transport)
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 headers: Optional[Dict] = None,
+                 validators: Optional[ValidatorCache] = None,
+                 store: Optional[Any] = None,
+                 limiter: Optional[Any] = None,
+                 retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 timeout: Optional[float] = None) -> None:
+        """Init method of Transport"""
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(headers or {})
+        self.validators = validators
+        self.store = store
+        self.limiter = limiter
+        self.retry = retry
+        self.breaker = breaker
+        self.timeout = timeout
+        self.closed = False
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request over the pooled session"""
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        return _observed(self.session.get, url, **kwargs)
+
+    def fetch(self, url: str,
+              params: Optional[Dict] = None) -> Tuple[Any, Dict]:
+        """Get JSON and the parsed ``Link`` header from remote URL"""
+        if self.store is None:
+            return self._fetch(url, params)[:2]
+        request = requests.models.PreparedRequest()
+        request.prepare_url(url, params)
+        cached = self.store.get(request.url)
+        registry = metrics.active
+        if registry is not None:
+            registry.record_cache("store", cached is not None)
+        if cached is not None:
+            return cached["payload"], cached["links"]
+        payload, links, status = self._fetch(url, params)
+        if status == 304 or 200 <= status < 300:
+            self.store.set(request.url, {"payload": payload, "links": links})
+        return payload, links
+
+    def _fetch(self, url: str,
+               params: Optional[Dict] = None) -> Tuple[Any, Dict, int]:
+        """Get JSON, links and the status code from the network"""
+        if self.validators is None:
+            response = self._send(url, params=params)
+            return response.json(), response.links, response.status_code
+        key = self.validators.key(url, params)
+        entry = self.validators.entry(key)
+        response = self._send(
+            url, params=params,
+            headers=self.validators.conditional_headers(entry))
+        registry = metrics.active
+        if registry is not None:
+            registry.record_cache("validators", response.status_code == 304)
+        if response.status_code == 304:
+            return entry["payload"], entry["links"], 304
+        payload = response.json()
+        self.validators.store(key, response, payload)
+        return payload, response.links, response.status_code
+
+    def _send(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request under the retry policy and breaker, if any;
+        raise HTTPError if the last attempt still failed"""
+        if self.retry is None and self.breaker is None:
+            return self._send_paced(url, **kwargs)
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            if self.breaker is not None:
+                self.breaker.before_request(host)
+            try:
+                response = self._send_paced(url, **kwargs)
+            except Exception as error:
+                failed = self._record(host, error=error)
+                if not failed or not self._should_retry(attempt):
+                    raise
+            else:
+                failed = self._record(host, response=response)
+                if not failed:
+                    return response
+                if not self._should_retry(attempt):
+                    raise requests.HTTPError(
+                        "{} Server Error for url: {}".format(
+                            response.status_code, url), response=response)
+            registry = metrics.active
+            if registry is not None:
+                registry.record_retry(url, "failure")
+            time.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+    def _record(self, host: str, **outcome) -> bool:
+        """Report a response or error to the breaker, True on failure.
+        Errors other than transient failures say nothing about the host
+        and are not reported."""
+        policy = self.retry or _DEFAULT_RETRY
+        failed = policy.is_failure(**outcome)
+        if self.breaker is not None:
+            if failed:
+                self.breaker.record_failure(host)
+            elif outcome.get("error") is not None:
+                self.breaker.release(host)
+            else:
+                self.breaker.record_success(host)
+        return failed
+
+    def _should_retry(self, attempt: int) -> bool:
+        """Whether a failed GET attempt is retried"""
+        return self.retry is not None and self.retry.should_retry(
+            "GET", attempt)
+
+    def _send_paced(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request paced by the limiter, if any"""
+        if self.limiter is None:
+            return self.get(url, **kwargs)
+        token = self.session.headers.get("Authorization")
+        attempt = 0
+        while True:
+            self.limiter.acquire(token)
+            response = self.get(url, **kwargs)
+            self.limiter.update(response, token)
+            if (not is_rate_limited(response)
+                    or attempt == self.limiter.max_retries):
+                return response
+            registry = metrics.active
+            if registry is not None:
+                registry.record_retry(url, "rate_limit")
+            self.limiter.retry_delay(response, attempt, token)
+            attempt += 1
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        self.session.close()
+        self.closed = True
+
+    def __enter__(self) -> "Transport":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_shared_transport: Optional[Transport] = None
+_shared_transport_lock = threading.Lock()
+
+
+class _Call:
+    """Outcome of an in-flight call, set once by its leader"""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class Coalescer:
+    """Process-wide table of in-flight requests.
+    Concurrent calls with the same key share one execution: the first
+    caller runs it and the others wait for its result, or its exception.
+    ``run`` coalesces threads and ``run_async`` coroutines of the same
+    event loop. The shared result must not be mutated by callers.
+    Example
+    -------
+    >>> INFLIGHT.run(INFLIGHT.key(url, op="json"), lambda: fetch(url))
+    """
+
+    def __init__(self) -> None:
+        """Init method of Coalescer"""
+        self._calls: Dict[Any, _Call] = {}
+        self._tasks: Dict[Any, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict] = None,
+            transport: Optional[Transport] = None,
+            op: str = "page") -> Tuple:
+        """Key of a GET request made by ``op``, whose results have one
+        shape. Requests sent with other credentials, or through another
+        transport, with its own validators, store and limits, never share
+        a response"""
+        auth = None
+        if transport is not None:
+            auth = transport.session.headers.get("Authorization")
+        return (op, url, None if params is None else tuple(sorted(
+            params.items())), auth, id(transport))
+
+    def run(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """Result of fn, shared with concurrent calls of the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        registry = metrics.active
+        if registry is not None:
+            registry.record_cache("inflight", not leader)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def run_async(self, key: Any,
+                        fn: Callable[[], Awaitable]) -> Any:
+        """Result of awaiting fn(), shared with concurrent awaits of the
+        same key on the running loop"""
+        loop_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            task = self._tasks.get(loop_key)
+            leader = task is None
+            if leader:
+                task = self._tasks[loop_key] = asyncio.ensure_future(fn())
+                task.add_done_callback(
+                    lambda task: self._forget(loop_key, task))
+        registry = metrics.active
+        if registry is not None:
+            registry.record_cache("inflight", not leader)
+        return await asyncio.shield(task)
+
+    def _forget(self, loop_key: Tuple, task: asyncio.Task) -> None:
+        """Drop a finished task from the table"""
+        with self._lock:
+            if self._tasks.get(loop_key) is task:
+                del self._tasks[loop_key]
+
+
+INFLIGHT = Coalescer()
+
+
+def _observed(send: Callable, url: str, **kwargs) -> requests.Response:
+    """send(url, **kwargs), reported to the active metrics registry"""
+    registry = metrics.active
+    if registry is None:
+        return send(url, **kwargs)
+    start = time.perf_counter()
+    try:
+        response = send(url, **kwargs)
+    except Exception as error:
+        registry.record_error(url, error, time.perf_counter() - start)
+        raise
+    registry.record_response(url, response, time.perf_counter() - start,
+                             kwargs.get("stream", False))
+    return response
+
+
+def shared_transport(**options) -> Transport:
+    """Get the process-wide transport.
+    It is created with ``options`` on first use, or after it was closed;
+    later calls return the same instance and ignore ``options``.
+    """
+    global _shared_transport
+    with _shared_transport_lock:
+        if _shared_transport is None or _shared_transport.closed:
+            _shared_transport = Transport(**options)
+        return _shared_transport
+
+
+def get_json(url: str, transport: Optional[Transport] = None) -> Dict:
     """Get JSON from remote URL.
+    Uses ``transport`` when given, a one-off connection otherwise. Every
+    request is reported to the active ``metrics`` registry, if any.
+    Concurrent calls for the same URL share one request and one parsed
+    result through ``INFLIGHT``; do not mutate it.
     """
-    response = requests.get(url)
+    if transport is not None:
+        return INFLIGHT.run(INFLIGHT.key(url, None, transport, "json"),
+                            lambda: transport.fetch(url)[0])
+    return INFLIGHT.run(INFLIGHT.key(url, op="json"),
+                        lambda: _observed(requests.get, url).json())
+
+
+def get_json_page(url: str, params: Optional[Dict] = None,
+                  transport: Optional[Transport] = None) -> Tuple[Any, Dict]:
+    """Get JSON and the parsed ``Link`` header from remote URL.
+    Concurrent calls are coalesced like those of ``get_json``.
+    """
+    return INFLIGHT.run(INFLIGHT.key(url, params, transport),
+                        lambda: _get_json_page(url, params, transport))
+
+
+def _get_json_page(url: str, params: Optional[Dict] = None,
+                   transport: Optional[Transport] = None) -> Tuple[Any, Dict]:
+    """get_json_page, always sending the request"""
+    if transport is not None:
+        return transport.fetch(url, params)
+    response = _observed(requests.get, url, params=params)
+    return response.json(), response.links
+
+
+def post_json(url: str, payload: Dict,
+              transport: Optional[Transport] = None) -> Dict:
+    """Post a JSON payload to remote URL and get JSON back.
+    Such requests are neither coalesced nor retried.
+    """
+    if transport is not None:
+        response = _observed(transport.session.post, url, json=payload,
+                             timeout=transport.timeout)
+    else:
+        response = _observed(requests.post, url, json=payload)
     return response.json()
 
 
+def get_json_pages(url: str, params: Optional[Dict] = None,
+                   transport: Optional[Transport] = None) -> Iterator[List]:
+    """Get JSON pages from a paginated remote URL.
+    Follows the ``Link: rel="next"`` header of each response and yields
+    every page as soon as it arrives, so only one page is held at a time.
+    Parameters
+    ----------
+    url: str
+        URL of the first page
+    params: Dict
+        query parameters sent with the first request only; the ``next``
+        links returned by the server already carry them
+    transport: Transport
+        pooled transport to send the requests through
+    Example
+    -------
+    >>> for page in get_json_pages(url, {"per_page": 100}):
+    ...     print(len(page))
+    100
+    42
+    """
+    while url:
+        page, links = get_json_page(url, params, transport)
+        yield page
+        url = links.get("next", {}).get("url")
+        params = None
+
+
+def get_json_stream(url: str, fields: Optional[Sequence[Sequence]] = None,
+                    params: Optional[Dict] = None,
+                    transport: Optional[Transport] = None,
+                    chunk_size: int = 64 * 1024) -> Iterator[Dict]:
+    """Get the objects of paginated JSON arrays, parsed incrementally.
+    Like ``get_json_pages`` but the body of each page is parsed while it
+    is downloaded and only the ``fields`` key paths of each object are
+    kept, see ``streaming.iter_json_array``. Responses are not cached.
+    Example
+    -------
+    >>> repos = get_json_stream(url, [("name",), ("license", "key")])
+    >>> next(repos)
+    {'name': 'episodes.dart', 'license': {'key': 'bsd-3-clause'}}
+    """
+    while url:
+        if transport is None:
+            response = _observed(requests.get, url, params=params,
+                                 stream=True)
+        else:
+            response = transport._send(url, params=params, stream=True)
+        with response:
+            yield from iter_json_array(
+                response.iter_content(chunk_size), fields)
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+
+def page_urls(links: Dict) -> List[str]:
+    """List the URLs of every page after the first one.
+    The page count is read from the ``rel="last"`` link of the first
+    response; an empty list is returned when it is missing.
+    Example
+    -------
+    >>> page_urls({"last": {"url": "https://x.org/repos?page=3"}})
+    ['https://x.org/repos?page=2', 'https://x.org/repos?page=3']
+    """
+    if "last" not in links:
+        return []
+    parts = urlsplit(links["last"]["url"])
+    query = parse_qs(parts.query)
+    last_page = int(query["page"][0])
+    urls = []
+    for page in range(2, last_page + 1):
+        query["page"] = [str(page)]
+        urls.append(urlunsplit(
+            parts._replace(query=urlencode(query, doseq=True))))
+    return urls
+
+
 def memoize(fn: Callable) -> Callable:
     """Decorator to memoize a method.
     Example
@@ -62,14 +625,212 @@ def memoize(fn: Callable) -> Callable:
     42
     >>> my_object.a_method
     42
+    Threads reading the property before it is computed wait for a single
+    call of the method instead of each calling it.
+    Coroutine methods become awaitable properties: concurrent awaits share
+    one task, its result is kept, and a failure is not cached.
+    Lookups are counted as hits and misses of ``memoize:<qualname>`` by
+    the active ``metrics`` registry, if any.
+    >>> await my_object.an_async_method
+    42
     """
+    if inspect.iscoroutinefunction(fn):
+        return _memoize_async(fn)
     attr_name = "_{}".format(fn.__name__)
+    lock_name = "_{}_lock".format(fn.__name__)
+    cache_name = "memoize:{}".format(fn.__qualname__)
 
     @wraps(fn)
     def memoized(self):
         """"memoized wraps"""
-        if not hasattr(self, attr_name):
-            setattr(self, attr_name, fn(self))
+        hit = hasattr(self, attr_name)
+        if not hit:
+            with _instance_lock(self, lock_name):
+                hit = hasattr(self, attr_name)
+                if not hit:
+                    setattr(self, attr_name, fn(self))
+        registry = metrics.active
+        if registry is not None:
+            registry.record_cache(cache_name, hit)
         return getattr(self, attr_name)
 
     return property(memoized)
+
+
+def _memoize_async(fn: Callable) -> Callable:
+    """memoize for coroutine methods"""
+    attr_name = "_{}".format(fn.__name__)
+    task_name = "_{}_task".format(fn.__name__)
+    cache_name = "memoize:{}".format(fn.__qualname__)
+
+    def settle(instance: Any, task: asyncio.Task) -> None:
+        """Keep the result of a finished task, forget the task"""
+        delattr(instance, task_name)
+        if not task.cancelled() and task.exception() is None:
+            setattr(instance, attr_name, task.result())
+
+    async def await_memoized(self):
+        """await the value, starting the task if needed"""
+        registry = metrics.active
+        if hasattr(self, attr_name):
+            if registry is not None:
+                registry.record_cache(cache_name, True)
+            return getattr(self, attr_name)
+        task = getattr(self, task_name, None)
+        if registry is not None:
+            registry.record_cache(cache_name, task is not None)
+        if task is None:
+            task = asyncio.ensure_future(fn(self))
+            setattr(self, task_name, task)
+            task.add_done_callback(lambda task: settle(self, task))
+        return await asyncio.shield(task)
+
+    @wraps(fn)
+    def memoized(self):
+        """"memoized wraps"""
+        return await_memoized(self)
+
+    return property(memoized)
+
+
+_memoize_lock = threading.Lock()
+
+
+def _instance_lock(instance: Any, lock_name: str) -> threading.Lock:
+    """Lock stored on instance under lock_name, created on first use"""
+    lock = getattr(instance, lock_name, None)
+    if lock is None:
+        with _memoize_lock:
+            lock = instance.__dict__.setdefault(lock_name, threading.Lock())
+    return lock
+
+
+class MemoCache:
+    """Process-wide LRU cache for memoized values.
+    Holds at most ``maxsize`` values, each for at most ``ttl`` seconds when
+    a TTL is given, and counts hits, misses and evictions.
+    """
+
+    def __init__(self, maxsize: int = 1024,
+                 ttl: Optional[float] = None) -> None:
+        """Init method of MemoCache"""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: Dict[Any, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Any) -> Any:
+        """Fresh value of key or _MISSING, with the lock held"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Fresh value of key, or default"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def get_or_set(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """Fresh value of key, computed once however many threads ask"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            lock = self._inflight.setdefault(key, threading.Lock())
+        with lock:
+            with self._lock:
+                value = self._lookup(key)
+            if value is not _MISSING:
+                with self._lock:
+                    self.hits += 1
+                return value
+            with self._lock:
+                self.misses += 1
+            try:
+                value = compute()
+                self.set(key, value)
+            finally:
+                with self._lock:
+                    if self._inflight.get(key) is lock:
+                        del self._inflight[key]
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        """Store value under key, evicting the least recently used"""
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Any) -> None:
+        """Forget key"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every value and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counts and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+
+def shared_memoize(key_attr: str, cache: MemoCache) -> Callable:
+    """Decorator to memoize a method in a process-wide cache.
+    Values are shared by every instance of the class with the same
+    ``key_attr`` attribute, instead of being stored on each instance, and
+    are computed once even when several threads ask at the same time.
+    Example
+    -------
+    CACHE = MemoCache(maxsize=128, ttl=300)
+    class MyClass:
+        def __init__(self, name):
+            self.name = name
+        @shared_memoize("name", CACHE)
+        def a_method(self):
+            print("a_method called")
+            return 42
+    >>> MyClass("a").a_method
+    a_method called
+    42
+    >>> MyClass("a").a_method
+    42
+    """
+    def decorator(fn: Callable) -> Callable:
+        """shared_memoize decorator"""
+        @wraps(fn)
+        def memoized(self):
+            """memoized wraps"""
+            key = (type(self), fn.__name__, getattr(self, key_attr))
+            return cache.get_or_set(key, lambda: fn(self))
+
+        return property(memoized)
+
+    return decorator
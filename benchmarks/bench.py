@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Topic: Benchmarks
+Author: Khotso Selading
+
+Benchmark suite for the github org client, its utilities and the async
+helpers. Every case is run after warm-up runs, a number of times, and
+reported as percentiles of its wall time in milliseconds.
+
+Usage:
+    ./benchmarks/bench.py                         # run and print
+    ./benchmarks/bench.py --sizes 1000,1000000    # public_repos sizes
+    ./benchmarks/bench.py --save benchmarks/baseline.json
+    ./benchmarks/bench.py --compare benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from os.path import abspath, dirname, join
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path[:0] = [
+    join(ROOT, "0x03-Unittests_and_integration_tests"),
+    join(ROOT, "0x01-python_async_function"),
+]
+
+from client import GithubOrgClient  # noqa: E402
+from fake_github import FakeGithub  # noqa: E402
+from fixtures import TEST_PAYLOAD  # noqa: E402
+from harness import summarize  # noqa: E402
+from utils import (  # noqa: E402
+    Transport, access_nested_map, compile_path, get_json, memoize
+)
+
+wait_n = __import__('1-concurrent_coroutines').wait_n
+wait_n_as_completed = __import__(
+    '1-concurrent_coroutines').wait_n_as_completed
+task_wait_n = __import__('4-tasks').task_wait_n
+
+ORG_PAYLOAD, REPOS_PAYLOAD = TEST_PAYLOAD[0][0], TEST_PAYLOAD[0][1]
+Case = Tuple[str, Callable[[], None]]
+
+
+def synthetic_repos(size: int) -> List[Dict]:
+    """size repos cycling through the fixture repos, shared not copied"""
+    return [REPOS_PAYLOAD[i % len(REPOS_PAYLOAD)] for i in range(size)]
+
+
+def nested_map_cases() -> Iterator[Case]:
+    """access_nested_map against compile_path over 10k repos"""
+    repos = synthetic_repos(10000)
+    path = ("license", "key")
+
+    def access() -> None:
+        for repo in repos:
+            try:
+                access_nested_map(repo, path)
+            except KeyError:
+                pass
+
+    yield "access_nested_map[10k]", access
+    yield "compile_path.many[10k]", lambda: compile_path(
+        path, default=None).many(repos)
+
+
+def memoize_cases() -> Iterator[Case]:
+    """memoize miss and hit cost, 10k accesses each"""
+    class Memoized:
+        @memoize
+        def value(self) -> int:
+            return 42
+
+    def miss() -> None:
+        for _ in range(10000):
+            Memoized().value
+
+    instance = Memoized()
+    instance.value
+
+    def hit() -> None:
+        for _ in range(10000):
+            instance.value
+
+    yield "memoize_miss[10k]", miss
+    yield "memoize_hit[10k]", hit
+
+
+def public_repos_cases(sizes: List[int]) -> Iterator[Case]:
+    """public_repos filtering over synthetic payloads, through a new
+    client, then 1000 lookups on an indexed one"""
+    for size in sizes:
+        repos = synthetic_repos(size)
+
+        def client(repos: List[Dict] = repos) -> GithubOrgClient:
+            cli = GithubOrgClient("google")
+            cli._org, cli._repos_payload = ORG_PAYLOAD, repos
+            return cli
+
+        indexed = client()
+        indexed.public_repos("apache-2.0")
+
+        def lookups(indexed: GithubOrgClient = indexed) -> None:
+            for _ in range(1000):
+                indexed.public_repos("apache-2.0")
+
+        yield "public_repos_first[{}]".format(size), (
+            lambda client=client: client().public_repos("apache-2.0"))
+        yield "public_repos_indexed[{}]".format(size), lookups
+
+
+def http_cases(server: FakeGithub) -> Iterator[Case]:
+    """get_json and pagination against the local fake GitHub server"""
+    url = server.url + "/orgs/google"
+    transport = Transport()
+
+    class StubClient(GithubOrgClient):
+        ORG_URL = server.org_url
+
+    def unpooled() -> None:
+        for _ in range(20):
+            get_json(url)
+
+    def pooled() -> None:
+        for _ in range(20):
+            get_json(url, transport)
+
+    def paginated() -> None:
+        list(StubClient("google", transport).iter_public_repos())
+
+    yield "get_json_unpooled[20]", unpooled
+    yield "get_json_pooled[20]", pooled
+    yield "iter_public_repos[300]", paginated
+
+
+def async_cases() -> Iterator[Case]:
+    """Task fan-out overhead of the 0x01 helpers, without delays"""
+    yield "wait_n[1000]", lambda: asyncio.run(wait_n(1000, 0))
+    yield "task_wait_n[1000]", lambda: asyncio.run(task_wait_n(1000, 0))
+
+    async def drain(n: int, max_concurrency: Optional[int]) -> None:
+        async for _ in wait_n_as_completed(n, 0, max_concurrency):
+            pass
+
+    yield "wait_n_as_completed[1000]", lambda: asyncio.run(drain(1000, None))
+    yield "wait_n_as_completed[100k,c=1000]", lambda: asyncio.run(
+        drain(100000, 1000))
+
+
+def measure(fn: Callable[[], None], repeat: int, warmup: int) -> List[int]:
+    """Wall times of repeat runs of fn in nanoseconds, after warmup runs"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Names of the cases whose p50 regressed beyond threshold"""
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = stats["p50"] / before["p50"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print("{:<32} {:>10.3f} -> {:>10.3f} ms  x{:.2f}{}".format(
+            name, before["p50"], stats["p50"], ratio, flag))
+    return regressions
+
+
+def main() -> int:
+    """Run the suite, then save or compare against a baseline"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="public_repos payload sizes, comma separated")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--filter", default="",
+                        help="only run cases whose name contains this")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to diff")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed p50 slowdown before failing")
+    args = parser.parse_args()
+
+    server = FakeGithub({"google": synthetic_repos(300)},
+                        rate_limit=10 ** 9).start()
+    cases = [
+        *nested_map_cases(),
+        *memoize_cases(),
+        *public_repos_cases([int(size) for size in args.sizes.split(",")]),
+        *http_cases(server),
+        *async_cases(),
+    ]
+    results = {}
+    for name, fn in cases:
+        if args.filter not in name:
+            continue
+        results[name] = summarize(measure(fn, args.repeat, args.warmup))
+        print("{:<32} p50 {p50:>10.3f}  p90 {p90:>10.3f}  "
+              "p99 {p99:>10.3f} ms".format(name, **results[name]))
+    server.stop()
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, file, indent=2, sort_keys=True)
+            file.write("\n")
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Topic: Benchmarks
+Author: Khotso Selading
+
+Timing harness for coroutines. Every trial awaits a fresh coroutine on
+one reused event loop, timed with perf_counter_ns after warm-up trials,
+so that loop creation and wall-clock adjustments are not measured. With
+instrumentation, each trial also reports the time the coroutine spent
+running (wall and CPU) against the time it spent awaiting, and the
+event loop lag, sampled by a probe callback.
+
+Usage:
+    ./benchmarks/harness.py measure_time --n 10 --max-delay 0.1
+    ./benchmarks/harness.py measure_runtime --instrument --json out.json
+    ./benchmarks/harness.py measure_time --loop asyncio
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from os.path import abspath, dirname, join
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    Generator,
+    List,
+    Optional,
+)
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+__all__ = [
+    "LagProbe",
+    "Traced",
+    "percentile",
+    "run_trials",
+    "summarize",
+]
+
+
+def percentile(samples: List[int], q: float) -> float:
+    """q-th percentile of samples, linearly interpolated"""
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[int]) -> Dict[str, float]:
+    """Percentiles of nanosecond samples in milliseconds"""
+    return {
+        "min": min(samples) / 1e6,
+        "p50": percentile(samples, 50) / 1e6,
+        "p90": percentile(samples, 90) / 1e6,
+        "p99": percentile(samples, 99) / 1e6,
+        "mean": sum(samples) / len(samples) / 1e6,
+        "runs": len(samples),
+    }
+
+
+class Traced:
+    """Awaitable stepping a coroutine itself to time each of its steps.
+    ``busy_ns`` and ``cpu_ns`` add up the wall and thread CPU time spent
+    inside the coroutine, ``wall_ns`` the time from its first step to its
+    end, of which ``await_ns`` was spent suspended.
+    """
+
+    def __init__(self, coro: Coroutine) -> None:
+        """Init method of Traced"""
+        self.coro = coro
+        self.steps = 0
+        self.busy_ns = 0
+        self.cpu_ns = 0
+        self.wall_ns = 0
+
+    @property
+    def await_ns(self) -> int:
+        """Time spent suspended"""
+        return self.wall_ns - self.busy_ns
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        start = time.perf_counter_ns()
+        send, value = self.coro.send, None
+        try:
+            while True:
+                step_start = time.perf_counter_ns()
+                cpu_start = time.thread_time_ns()
+                try:
+                    yielded = send(value)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    self.cpu_ns += time.thread_time_ns() - cpu_start
+                    self.busy_ns += time.perf_counter_ns() - step_start
+                    self.steps += 1
+                try:
+                    send, value = self.coro.send, (yield yielded)
+                except BaseException as error:
+                    send, value = self.coro.throw, error
+        finally:
+            self.wall_ns = time.perf_counter_ns() - start
+
+
+class LagProbe:
+    """Samples event loop lag: the delay between scheduling a callback
+    with call_soon and the loop running it, every interval seconds"""
+
+    def __init__(self, interval: float = 0.001) -> None:
+        """Init method of LagProbe"""
+        self.interval = interval
+        self.samples: List[int] = []
+        self._handle: Optional[asyncio.Handle] = None
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start sampling on loop"""
+        self._loop = loop
+        self._schedule()
+
+    def stop(self) -> None:
+        """Stop sampling"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self) -> None:
+        self._handle = self._loop.call_soon(self._probe,
+                                            time.perf_counter_ns())
+
+    def _probe(self, scheduled: int) -> None:
+        self.samples.append(time.perf_counter_ns() - scheduled)
+        self._handle = self._loop.call_later(self.interval, self._schedule)
+
+
+def run_trials(factory: Callable[[], Coroutine], trials: int = 20,
+               warmup: int = 3, instrument: bool = False,
+               loop_factory: Callable[[], asyncio.AbstractEventLoop] = (
+                   asyncio.new_event_loop)) -> Dict[str, Any]:
+    """Time trials runs of factory() on one event loop, after warmup
+    untimed ones, and summarize them in milliseconds"""
+    loop = loop_factory()
+    try:
+        for _ in range(warmup):
+            loop.run_until_complete(factory())
+        wall: List[int] = []
+        traces: List[Traced] = []
+        probe = LagProbe()
+        if instrument:
+            probe.start(loop)
+        for _ in range(trials):
+            awaitable = factory()
+            if instrument:
+                awaitable = Traced(awaitable)
+                traces.append(awaitable)
+            start = time.perf_counter_ns()
+            loop.run_until_complete(_await(awaitable))
+            wall.append(time.perf_counter_ns() - start)
+        probe.stop()
+        result: Dict[str, Any] = {
+            "loop": type(loop).__module__ + "." + type(loop).__name__,
+            "wall": summarize(wall),
+        }
+        if instrument:
+            result["busy"] = summarize([trace.busy_ns for trace in traces])
+            result["cpu"] = summarize([trace.cpu_ns for trace in traces])
+            result["await"] = summarize([trace.await_ns
+                                         for trace in traces])
+            result["steps"] = traces[-1].steps
+            if probe.samples:
+                result["lag"] = summarize(probe.samples)
+        return result
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+async def _await(awaitable: Awaitable) -> Any:
+    """Coroutine awaiting awaitable, as run_until_complete wants"""
+    return await awaitable
+
+
+def targets(args: argparse.Namespace) -> Dict[str, Callable[[], Coroutine]]:
+    """Coroutine factories of the measured project functions"""
+    sys.path[:0] = [join(ROOT, "0x01-python_async_function"),
+                    join(ROOT, "0x02-python_async_comprehension")]
+    wait_n = __import__('1-concurrent_coroutines').wait_n
+    async_comprehension = __import__(
+        '1-async_comprehension').async_comprehension
+
+    async def comprehensions() -> None:
+        await asyncio.gather(*(async_comprehension() for _ in range(4)))
+    return {
+        "measure_time": lambda: wait_n(args.n, args.max_delay),
+        "measure_runtime": comprehensions,
+    }
+
+
+def main() -> int:
+    """Time one target and print, or save, the results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("target", choices=("measure_time",
+                                           "measure_runtime"))
+    parser.add_argument("--n", type=int, default=10,
+                        help="wait_n coroutines for measure_time")
+    parser.add_argument("--max-delay", type=float, default=0.1)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--instrument", action="store_true")
+    parser.add_argument("--loop", choices=("asyncio", "uvloop"),
+                        help="event loop, uvloop when installed by default")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    factories = targets(args)
+    new_event_loop = __import__('6-event_loop').new_event_loop
+    result = run_trials(factories[args.target], args.trials, args.warmup,
+                        args.instrument, lambda: new_event_loop(args.loop))
+    result.update(target=args.target, python=platform.python_version(),
+                  platform=platform.platform())
+    if args.target == "measure_time":
+        result.update(n=args.n, max_delay=args.max_delay)
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.json:
+        with open(args.json, "w") as file:
+            file.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Topic: Benchmarks
+Author: Khotso Selading
+
+Event loop comparison: task-heavy fan-outs run on every available event
+loop (asyncio, and uvloop when it is installed) with the timing harness.
+Each fan-out is reported as its wall time percentiles, its throughput in
+tasks per second at the median, and the event loop lag while it runs.
+
+Usage:
+    ./benchmarks/loops.py                     # run and print
+    ./benchmarks/loops.py --n 100000 --json loops.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+from os.path import abspath, dirname, join
+from typing import Callable, Coroutine, Dict, Iterator, Tuple
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path[:0] = [join(ROOT, "0x01-python_async_function")]
+
+from harness import run_trials  # noqa: E402
+
+event_loop = __import__('6-event_loop')
+wait_n = __import__('1-concurrent_coroutines').wait_n
+task_wait_n = __import__('4-tasks').task_wait_n
+
+Case = Tuple[str, Callable[[], Coroutine]]
+
+
+def fan_outs(n: int) -> Iterator[Case]:
+    """Fan-outs of n zero-delay tasks"""
+    async def gather_sleeps() -> None:
+        await asyncio.gather(*(asyncio.sleep(0) for _ in range(n)))
+
+    async def create_tasks() -> None:
+        tasks = [asyncio.ensure_future(asyncio.sleep(0)) for _ in range(n)]
+        for task in tasks:
+            await task
+
+    yield "gather(sleep(0))[{}]".format(n), gather_sleeps
+    yield "create_task[{}]".format(n), create_tasks
+    yield "wait_n[{}]".format(n), lambda: wait_n(n, 0)
+    yield "task_wait_n[{}]".format(n), lambda: task_wait_n(n, 0)
+
+
+def main() -> int:
+    """Run the fan-outs on every loop and print, or save, the results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--n", type=int, default=10000,
+                        help="tasks per fan-out")
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict] = {}
+    for name in event_loop.available():
+        results[name] = {}
+        for case, factory in fan_outs(args.n):
+            result = run_trials(
+                factory, args.trials, args.warmup, instrument=True,
+                loop_factory=lambda: event_loop.new_event_loop(name))
+            result["tasks_per_second"] = args.n / result["wall"]["p50"] * 1e3
+            results[name][case] = result
+            lag = result.get("lag", {})
+            print("{:<8} {:<28} p50 {:>9.3f}  p99 {:>9.3f} ms  "
+                  "{:>12,.0f} tasks/s  lag p99 {:>7.3f} ms".format(
+                      name, case, result["wall"]["p50"],
+                      result["wall"]["p99"], result["tasks_per_second"],
+                      lag.get("p99", 0.0)))
+    if "uvloop" not in results:
+        print("uvloop is not installed, only asyncio was measured")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "n": args.n,
+                "loops": results,
+            }, file, indent=2, sort_keys=True)
+            file.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
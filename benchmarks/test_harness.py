@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Topic: Benchmarks
+Author: Khotso Selading
+"""
+
+import asyncio
+import time
+import unittest
+from harness import Traced, percentile, run_trials, summarize
+from parameterized import parameterized
+
+SLEEP = 0.05
+BURN = 0.03
+
+
+def burn(seconds: float) -> None:
+    """keep the CPU busy for seconds of thread time"""
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+async def sleep_and_burn() -> str:
+    """await SLEEP seconds around BURN seconds of CPU work"""
+    await asyncio.sleep(SLEEP / 2)
+    burn(BURN)
+    await asyncio.sleep(SLEEP / 2)
+    return "done"
+
+
+class TestSummary(unittest.TestCase):
+    """
+    TestSummary
+    """
+
+    @parameterized.expand([
+        ([5], 50, 5),
+        ([1, 2, 3, 4, 5], 0, 1),
+        ([1, 2, 3, 4, 5], 50, 3),
+        ([5, 1, 4, 2, 3], 100, 5),
+        ([1, 2, 3, 4], 50, 2.5),
+        ([0, 10], 90, 9),
+    ])
+    def test_percentile(self, samples, q, expected):
+        """tests the interpolated percentiles of unsorted samples"""
+        self.assertAlmostEqual(percentile(samples, q), expected)
+
+    def test_summarize(self):
+        """tests that nanosecond samples are summarized in milliseconds"""
+        summary = summarize([4_000_000, 1_000_000, 2_000_000, 3_000_000])
+        self.assertEqual(summary["runs"], 4)
+        self.assertAlmostEqual(summary["min"], 1.0)
+        self.assertAlmostEqual(summary["p50"], 2.5)
+        self.assertAlmostEqual(summary["p99"], 3.97)
+        self.assertAlmostEqual(summary["mean"], 2.5)
+
+
+class TestTraced(unittest.TestCase):
+    """
+    TestTraced
+    """
+
+    def test_split(self):
+        """tests that busy and await time split the wall time between the
+        CPU work and the sleeps of a coroutine"""
+        traced = Traced(sleep_and_burn())
+        self.assertEqual(asyncio.run(_await(traced)), "done")
+        self.assertEqual(traced.busy_ns + traced.await_ns, traced.wall_ns)
+        self.assertGreaterEqual(traced.cpu_ns, BURN * 1e9)
+        self.assertGreaterEqual(traced.busy_ns, traced.cpu_ns * 0.9)
+        self.assertLess(traced.busy_ns, (BURN + SLEEP / 2) * 1e9)
+        self.assertGreaterEqual(traced.await_ns, SLEEP * 0.9 * 1e9)
+        self.assertEqual(traced.steps, 3)
+
+    def test_error(self):
+        """tests that exceptions are thrown into, and raised from, the
+        traced coroutine"""
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        traced = Traced(fail())
+        with self.assertRaises(ValueError):
+            asyncio.run(_await(traced))
+        self.assertGreater(traced.wall_ns, 0)
+
+
+class TestRunTrials(unittest.TestCase):
+    """
+    TestRunTrials
+    """
+
+    def test_instrument(self):
+        """tests the summaries of instrumented trials"""
+        result = run_trials(sleep_and_burn, trials=2, warmup=1,
+                            instrument=True)
+        self.assertEqual(result["wall"]["runs"], 2)
+        self.assertEqual(result["steps"], 3)
+        for name in ("busy", "cpu", "await", "lag"):
+            self.assertIn(name, result)
+        self.assertGreaterEqual(result["wall"]["min"],
+                                (SLEEP + BURN) * 0.9 * 1e3)
+
+
+async def _await(awaitable):
+    """coroutine awaiting awaitable, for asyncio.run"""
+    return await awaitable
+
+
+if __name__ == "__main__":
+    unittest.main()